@@ -0,0 +1,61 @@
+"""
+Move tables for every board index, built once at import.
+Indexes follow ChessEngine.board: 0 is a8, 63 is h1 and white pawns move towards index 0.
+"""
+from Enums.SideEnum import SideEnum as Side
+
+# Board directions as (file step, row step), keyed by the matching one dimensional offset.
+DIRECTIONS = {
+    -9: (-1, -1), -8: (0, -1), -7: (1, -1),
+    -1: (-1, 0), 1: (1, 0),
+    7: (-1, 1), 8: (0, 1), 9: (1, 1)
+}
+ORTHOGONAL_DIRECTIONS = [-8, -1, 1, 8]
+DIAGONAL_DIRECTIONS = [-9, -7, 7, 9]
+
+KNIGHT_STEPS = [(1, 2), (-1, 2), (2, 1), (-2, 1), (1, -2), (-1, -2), (2, -1), (-2, -1)]
+
+
+def _on_board(file: int, row: int) -> bool:
+    return 0 <= file <= 7 and 0 <= row <= 7
+
+
+def _build_leaper_targets(steps: list[tuple[int, int]]) -> list[list[int]]:
+    table = []
+    for square in range(64):
+        targets = []
+        for file_step, row_step in steps:
+            file, row = square % 8 + file_step, square // 8 + row_step
+            if _on_board(file, row):
+                targets.append(file + 8 * row)
+        table.append(targets)
+    return table
+
+
+# Squares along a direction, ordered from nearest to furthest.
+def _build_rays(file_step: int, row_step: int) -> list[list[int]]:
+    table = []
+    for square in range(64):
+        ray = []
+        file, row = square % 8 + file_step, square // 8 + row_step
+        while _on_board(file, row):
+            ray.append(file + 8 * row)
+            file, row = file + file_step, row + row_step
+        table.append(ray)
+    return table
+
+
+KNIGHT_TARGETS = _build_leaper_targets(KNIGHT_STEPS)
+KING_TARGETS = _build_leaper_targets(list(DIRECTIONS.values()))
+PAWN_ATTACKS = {
+    Side.WHITE: _build_leaper_targets([(-1, -1), (1, -1)]),
+    Side.BLACK: _build_leaper_targets([(-1, 1), (1, 1)])
+}
+RAYS = {direction: _build_rays(*step) for direction, step in DIRECTIONS.items()}
+
+
+def squares_to_mask(squares: list[int]) -> int:
+    mask = 0
+    for square in squares:
+        mask |= 1 << square
+    return mask
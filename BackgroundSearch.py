@@ -0,0 +1,85 @@
+import queue
+import threading
+from typing import Callable
+
+from Engine import ChessEngine
+from Move import Move
+
+
+class BackgroundSearch:
+    """
+    Runs ChessEngine.search_moves on a worker thread, so the caller can keep drawing and handling input while it thinks.
+    The search works on an engine of its own, loaded with a copy of the position, so the board being shown does not change.
+    Finished searches put their move on a result queue, which poll reads without blocking,
+    or hand it to the callback given to start, on the search thread.
+    """
+
+    def __init__(self, **engine_options) -> None:
+        self.engine = ChessEngine(**engine_options)
+        self.results: queue.Queue = queue.Queue()
+        self.__thread: threading.Thread = None
+        self.__stopEvent: threading.Event = None
+        self.__searchId = 0
+
+    # Starts searching the position of the given engine, cancelling any search still running.
+    # on_result: called with the move once the search finishes, instead of queueing it for poll.
+    def start(self, position: ChessEngine, depth: int = None, time_limit_ms: float = None, node_limit: int = None,
+              on_result: Callable[[Move], None] = None) -> None:
+        self.cancel()
+        self.engine.load_position(list(position.board), position.SideToPlay, position.castlingRights, position.enPassantSquare,
+                                  position.halfmoveClock, position.fullmoveNumber)
+        self.__searchId += 1
+        self.__stopEvent = threading.Event()
+        self.__thread = threading.Thread(
+            target=self.__run, args=(self.__searchId, depth, time_limit_ms, node_limit, self.__stopEvent, on_result), daemon=True
+        )
+        self.__thread.start()
+
+    def __run(self, searchId: int, depth: int, time_limit_ms: float, node_limit: int, stop_event: threading.Event,
+              on_result: Callable[[Move], None]) -> None:
+        move = self.engine.search_moves(self.engine.generate_legal_moves(), depth, time_limit_ms, node_limit, stop_event=stop_event)
+        if on_result is None:
+            self.results.put((searchId, move))
+        elif searchId == self.__searchId:
+            on_result(move)
+
+    @property
+    def thinking(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    # Depth and nodes of the running search, for progress displays.
+    @property
+    def depth(self) -> int:
+        return self.engine.current_depth
+
+    @property
+    def nodes(self) -> int:
+        return self.engine.nodes
+
+    # Returns the move of the last started search once it has finished, otherwise None.
+    def poll(self) -> Move:
+        while True:
+            try:
+                searchId, move = self.results.get_nowait()
+            except queue.Empty:
+                return None
+            # Results of cancelled searches are dropped.
+            if searchId == self.__searchId:
+                return move
+
+    # Stops the running search and waits for the thread to finish. Its move is never returned by poll or given to the callback.
+    def cancel(self) -> None:
+        if self.__thread is None:
+            return
+        self.__searchId += 1
+        self.__stopEvent.set()
+        self.__thread.join()
+        self.__thread = None
+
+    # Stops the running search as soon as it has a move and waits for it, the move is delivered as usual.
+    def stop(self) -> None:
+        if self.__thread is None:
+            return
+        self.__stopEvent.set()
+        self.__thread.join()
+        self.__thread = None
@@ -0,0 +1,84 @@
+"""
+Evaluates many positions at once with NumPy, for offline jobs which score large numbers of positions.
+Positions are encoded as 64 int8 codes per board: 0 for an empty square,
+1 to 6 for white pawn, knight, bishop, rook, queen and king, and the negated code for black pieces.
+Scores are the same as Evaluator.evaluate_board.
+"""
+from typing import Iterable, Iterator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from Enums.SideEnum import SideEnum as Side
+from Pieces.BasePiece import IPiece
+from Bitboard import PIECE_ORDER
+from Evaluator import piece_worth, side_piece_tables, POSITIONAL_SCALE
+
+PIECE_CODES = {pieceType: i + 1 for i, pieceType in enumerate(PIECE_ORDER)}
+# Codes run from -6 to 6, lookup tables are indexed by code + CODE_OFFSET.
+CODE_OFFSET = 6
+
+
+def encode_board(board: list[IPiece]) -> list[int]:
+    return [
+        0 if cell is None else PIECE_CODES[cell.pieceType] * (1 if cell.side is Side.WHITE else -1)
+        for cell in board
+    ]
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("BatchEvaluator requires numpy, install it with: pip install numpy")
+
+
+def _build_lookups():
+    material = np.zeros(2 * CODE_OFFSET + 1, dtype=np.int64)
+    positional = np.zeros((2 * CODE_OFFSET + 1, 64), dtype=np.int64)
+    for pieceType, code in PIECE_CODES.items():
+        material[CODE_OFFSET + code] = piece_worth[pieceType]
+        material[CODE_OFFSET - code] = -piece_worth[pieceType]
+        positional[CODE_OFFSET + code] = side_piece_tables[Side.WHITE][pieceType]
+        positional[CODE_OFFSET - code] = [-value for value in side_piece_tables[Side.BLACK][pieceType]]
+    return material, positional
+
+
+_lookups = None
+
+
+def encode_boards(boards: Iterable[list[IPiece]]) -> "np.ndarray":
+    _require_numpy()
+    return np.array([encode_board(board) for board in boards], dtype=np.int8).reshape(-1, 64)
+
+
+def evaluate_batch(positions: "np.ndarray", use_positional: bool = False) -> "np.ndarray":
+    """
+    positions: (N, 64) int8 array of encoded boards.
+    Returns N scores, integers for material only and floats with the piece-square term.
+    """
+    global _lookups
+    _require_numpy()
+    if _lookups is None:
+        _lookups = _build_lookups()
+    material_lookup, positional_lookup = _lookups
+
+    indexes = np.asarray(positions, dtype=np.int8).reshape(-1, 64).astype(np.intp) + CODE_OFFSET
+    material = material_lookup[indexes].sum(axis=1)
+    if not use_positional:
+        return material
+    positional = positional_lookup[indexes, np.arange(64)].sum(axis=1)
+    return material + positional / POSITIONAL_SCALE
+
+
+# Scores a stream of encoded boards in chunks of batch_size, holding one chunk in memory at a time.
+def evaluate_stream(positions: Iterable, batch_size: int = 4096, use_positional: bool = False) -> Iterator["np.ndarray"]:
+    _require_numpy()
+    chunk = []
+    for position in positions:
+        chunk.append(position)
+        if len(chunk) == batch_size:
+            yield evaluate_batch(np.array(chunk, dtype=np.int8), use_positional)
+            chunk = []
+    if chunk:
+        yield evaluate_batch(np.array(chunk, dtype=np.int8), use_positional)
@@ -0,0 +1,265 @@
+"""
+Endgame bitbases for king and queen, rook or pawn against a lone king.
+Each table stores one bit per position: set when the side with the extra piece wins, clear for a draw.
+The lone king can never win, so one bit is enough. Tables are generated by retrograde analysis
+from checkmates (and, for pawns, promotions) back through un-moves, using the engine's attack tables,
+and are memory mapped when probed.
+Generate with: python Bitbase.py [--directory DIRECTORY]
+"""
+import argparse
+import mmap
+import os
+import time
+from collections import deque
+
+from Enums.SideEnum import SideEnum as Side
+from Enums.PieceEnum import PieceEnum as PieceType
+from Pieces.BasePiece import IPiece
+from AttackTables import KING_TARGETS, RAYS, ORTHOGONAL_DIRECTIONS, DIAGONAL_DIRECTIONS
+from Bitboard import KING_MASKS, PAWN_ATTACK_MASKS, sliding_attacks
+from Evaluator import piece_worth
+
+DEFAULT_BITBASE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bitbases")
+# Tables in the order they are generated, pawn endings promote into the queen and rook tables.
+TABLES = {"kqk": PieceType.QUEEN, "krk": PieceType.ROOK, "kpk": PieceType.PAWN}
+MAX_BITBASE_PIECES = 3
+
+# Positions are indexed by side to move (0 for the side with the extra piece), then its king, its piece and the lone king.
+# Squares are seen from the stronger side playing white: black pieces have their ranks flipped.
+STRONG_TO_MOVE = 0
+WEAK_TO_MOVE = 1
+POSITIONS = 2 * 64 * 64 * 64
+TABLE_BYTES = POSITIONS // 8
+
+# Won positions score below mate, the rest of the score leads the search towards the win.
+BITBASE_WIN_SCORE = 10000
+
+PIECE_DIRECTIONS = {
+    PieceType.QUEEN: ORTHOGONAL_DIRECTIONS + DIAGONAL_DIRECTIONS,
+    PieceType.ROOK: ORTHOGONAL_DIRECTIONS,
+}
+
+
+def position_index(to_move: int, strong_king: int, piece: int, weak_king: int) -> int:
+    return ((to_move * 64 + strong_king) * 64 + piece) * 64 + weak_king
+
+
+def piece_attacks(pieceType: PieceType, square: int, occupied: int) -> int:
+    if pieceType is PieceType.PAWN:
+        return PAWN_ATTACK_MASKS[Side.WHITE][square]
+    return sliding_attacks(square, occupied, PIECE_DIRECTIONS[pieceType])
+
+
+# Squares the piece on square could have come from with one move, given the occupied squares.
+def piece_origins(pieceType: PieceType, square: int, occupied: int) -> list[int]:
+    if pieceType is PieceType.PAWN:
+        # White pawns move towards index 0, so they come from a higher index, and from their starting row by a double push.
+        origins = []
+        if square + 8 < 56 and not occupied >> (square + 8) & 1:
+            origins.append(square + 8)
+            if square // 8 == 4 and not occupied >> (square + 16) & 1:
+                origins.append(square + 16)
+        return origins
+    origins = []
+    for direction in PIECE_DIRECTIONS[pieceType]:
+        for origin in RAYS[direction][square]:
+            if occupied >> origin & 1:
+                break
+            origins.append(origin)
+    return origins
+
+
+def valid_piece_square(pieceType: PieceType, square: int) -> bool:
+    # Pawns are never on the first or last row.
+    return pieceType is not PieceType.PAWN or 8 <= square < 56
+
+
+def generate_table(pieceType: PieceType, promotion_tables: list = None) -> bytearray:
+    """
+    Marks every won position, starting from checkmates of the lone king (and won promotions),
+    then walking back: a position with the strong side to move is won if one move reaches a won position,
+    a position with the lone king to move is won once every one of its moves reaches a won position.
+    promotion_tables: (piece type, table) pairs pawns can promote into, best first.
+    Returns the table packed 8 positions per byte.
+    """
+    won = bytearray(POSITIONS)
+    # Remaining moves of the lone king which do not reach a won position, for lone king to move positions.
+    remaining = bytearray(64 * 64 * 64)
+    queue = deque()
+
+    def mark(index: int) -> None:
+        won[index] = 1
+        queue.append(index)
+
+    for strong_king in range(64):
+        for piece in range(64):
+            if piece == strong_king or not valid_piece_square(pieceType, piece):
+                continue
+            for weak_king in range(64):
+                if weak_king in (strong_king, piece) or KING_MASKS[strong_king] >> weak_king & 1:
+                    continue
+                occupied = 1 << strong_king | 1 << piece
+                attacked = piece_attacks(pieceType, piece, occupied | 1 << weak_king) | KING_MASKS[strong_king]
+                # Lone king to move, count its moves.
+                moves = 0
+                for target in KING_TARGETS[weak_king]:
+                    if target == strong_king or KING_MASKS[strong_king] >> target & 1:
+                        continue
+                    if target == piece:
+                        moves += 1
+                        continue
+                    if not piece_attacks(pieceType, piece, occupied) >> target & 1:
+                        moves += 1
+                remaining[position_index(0, strong_king, piece, weak_king)] = moves
+                if moves == 0 and attacked >> weak_king & 1:
+                    mark(position_index(WEAK_TO_MOVE, strong_king, piece, weak_king))
+
+                # Strong side to move, only legal when the lone king is not in check.
+                if attacked >> weak_king & 1 or promotion_tables is None or piece // 8 != 1:
+                    continue
+                promoted = piece - 8
+                if promoted in (strong_king, weak_king):
+                    continue
+                # The promoted tables already cover the lone king taking the new piece, or being stalemated by it.
+                for _, table in promotion_tables:
+                    if table_bit(table, position_index(WEAK_TO_MOVE, strong_king, promoted, weak_king)):
+                        mark(position_index(STRONG_TO_MOVE, strong_king, piece, weak_king))
+                        break
+
+    while queue:
+        index = queue.popleft()
+        weak_king = index & 63
+        piece = index >> 6 & 63
+        strong_king = index >> 12 & 63
+        to_move = index >> 18
+        occupied = 1 << strong_king | 1 << piece | 1 << weak_king
+        if to_move == WEAK_TO_MOVE:
+            # The strong side moved into this position, with its king or its piece.
+            for origin in KING_TARGETS[strong_king]:
+                if occupied >> origin & 1 or KING_MASKS[origin] >> weak_king & 1:
+                    continue
+                # The lone king must not have been left in check.
+                if piece_attacks(pieceType, piece, occupied ^ 1 << strong_king | 1 << origin) >> weak_king & 1:
+                    continue
+                previous = position_index(STRONG_TO_MOVE, origin, piece, weak_king)
+                if not won[previous]:
+                    mark(previous)
+            for origin in piece_origins(pieceType, piece, occupied):
+                if piece_attacks(pieceType, origin, occupied ^ 1 << piece | 1 << origin) >> weak_king & 1:
+                    continue
+                previous = position_index(STRONG_TO_MOVE, strong_king, origin, weak_king)
+                if not won[previous]:
+                    mark(previous)
+        else:
+            # The lone king moved into this position.
+            for origin in KING_TARGETS[weak_king]:
+                if occupied >> origin & 1 or KING_MASKS[strong_king] >> origin & 1:
+                    continue
+                previous = position_index(WEAK_TO_MOVE, strong_king, piece, origin)
+                if won[previous]:
+                    continue
+                counter = position_index(0, strong_king, piece, origin)
+                remaining[counter] -= 1
+                if remaining[counter] == 0:
+                    mark(previous)
+
+    packed = bytearray(TABLE_BYTES)
+    for index in range(POSITIONS):
+        if won[index]:
+            packed[index >> 3] |= 1 << (index & 7)
+    return packed
+
+
+def table_bit(table, index: int) -> bool:
+    return table[index >> 3] >> (index & 7) & 1 == 1
+
+
+def generate_all(directory: str = DEFAULT_BITBASE_DIRECTORY) -> dict[str, float]:
+    os.makedirs(directory, exist_ok=True)
+    generated: dict[str, bytearray] = {}
+    seconds = {}
+    for name, pieceType in TABLES.items():
+        start = time.perf_counter()
+        promotion_tables = None
+        if pieceType is PieceType.PAWN:
+            promotion_tables = [(PieceType.QUEEN, generated["kqk"]), (PieceType.ROOK, generated["krk"])]
+        generated[name] = generate_table(pieceType, promotion_tables)
+        with open(os.path.join(directory, f"{name}.bin"), "wb") as file:
+            file.write(generated[name])
+        seconds[name] = round(time.perf_counter() - start, 2)
+    return seconds
+
+
+class Bitbases:
+    """
+    The bitbase files found in a directory, memory mapped. Missing tables are not probed.
+    """
+
+    def __init__(self, directory: str = DEFAULT_BITBASE_DIRECTORY) -> None:
+        self.tables = {}
+        self.__files = []
+        for name, pieceType in TABLES.items():
+            path = os.path.join(directory, f"{name}.bin")
+            if not os.path.exists(path) or os.path.getsize(path) != TABLE_BYTES:
+                continue
+            file = open(path, "rb")
+            self.__files.append(file)
+            self.tables[pieceType] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __bool__(self) -> bool:
+        return len(self.tables) != 0
+
+    """
+    Looks up a position with a king and one queen, rook or pawn against a lone king.
+    pieceSquares: board indexes of the pieces of each side, indexed by side value.
+    Returns 0 for a draw, a score from white's perspective for a win, or None when no table covers the position.
+    """
+    def probe(self, board: list[IPiece], pieceSquares: list[set[int]], side_to_play: Side):
+        if len(pieceSquares[0]) + len(pieceSquares[1]) != MAX_BITBASE_PIECES:
+            return None
+        strong = Side.WHITE if len(pieceSquares[0]) == 2 else Side.BLACK
+        strong_king = piece = None
+        for square in pieceSquares[strong.value]:
+            if board[square].pieceType is PieceType.KING:
+                strong_king = square
+            else:
+                piece = square
+        if strong_king is None or board[piece].pieceType not in self.tables:
+            return None
+        pieceType = board[piece].pieceType
+        weak_king = next(iter(pieceSquares[1 - strong.value]))
+        # Tables are built with the strong side as white.
+        if strong is Side.BLACK:
+            strong_king, piece, weak_king = strong_king ^ 56, piece ^ 56, weak_king ^ 56
+        to_move = STRONG_TO_MOVE if side_to_play is strong else WEAK_TO_MOVE
+        if not table_bit(self.tables[pieceType], position_index(to_move, strong_king, piece, weak_king)):
+            return 0
+        # The extra piece's worth keeps promoting better than any pawn ending.
+        score = BITBASE_WIN_SCORE + 100 * piece_worth[pieceType] + win_progress(pieceType, strong_king, piece, weak_king)
+        return score if strong is Side.WHITE else -score
+
+    def close(self) -> None:
+        for table in self.tables.values():
+            table.close()
+        for file in self.__files:
+            file.close()
+        self.tables = {}
+
+
+# Small bonus steering a won ending towards the mate: advancing the pawn,
+# or driving the lone king to the edge with the strong king close by.
+def win_progress(pieceType: PieceType, strong_king: int, piece: int, weak_king: int) -> int:
+    if pieceType is PieceType.PAWN:
+        return 10 * (6 - piece // 8)
+    edge = max(abs(2 * (weak_king % 8) - 7), abs(2 * (weak_king // 8) - 7))
+    distance = max(abs(strong_king % 8 - weak_king % 8), abs(strong_king // 8 - weak_king // 8))
+    return 10 * edge + 7 - distance
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the endgame bitbases.")
+    parser.add_argument("--directory", default=DEFAULT_BITBASE_DIRECTORY, help="directory to write the tables to")
+    args = parser.parse_args()
+
+    for name, seconds in generate_all(args.directory).items():
+        print(f"{name}: {seconds}s")
@@ -0,0 +1,271 @@
+from Enums.SideEnum import SideEnum as Side
+from Enums.PieceEnum import PieceEnum as PieceType
+from Move import Move, CastleMove, PromotionMove, PROMOTION_CLASSES
+from Pieces.BasePiece import IPiece
+from AttackTables import (
+    KNIGHT_TARGETS, KING_TARGETS, PAWN_ATTACKS, RAYS,
+    ORTHOGONAL_DIRECTIONS, DIAGONAL_DIRECTIONS, squares_to_mask
+)
+from ChessUtility import WHITE_SHORT_CASTLE, WHITE_LONG_CASTLE, BLACK_SHORT_CASTLE, BLACK_LONG_CASTLE
+
+# Order of the six bitboards of a side. White boards come first, then black.
+PIECE_ORDER = [PieceType.PAWN, PieceType.KNIGHT, PieceType.BISHOP, PieceType.ROOK, PieceType.QUEEN, PieceType.KING]
+PIECE_INDEX = {piece_type: i for i, piece_type in enumerate(PIECE_ORDER)}
+
+KNIGHT_MASKS = [squares_to_mask(targets) for targets in KNIGHT_TARGETS]
+KING_MASKS = [squares_to_mask(targets) for targets in KING_TARGETS]
+PAWN_ATTACK_MASKS = {side: [squares_to_mask(targets) for targets in table] for side, table in PAWN_ATTACKS.items()}
+RAY_MASKS = {direction: [squares_to_mask(ray) for ray in table] for direction, table in RAYS.items()}
+FULL_MASK = (1 << 64) - 1
+
+
+def bitboard_index(side: Side, piece_type: PieceType) -> int:
+    return side.value * 6 + PIECE_INDEX[piece_type]
+
+
+def iterate_squares(bitboard: int):
+    while bitboard:
+        lowest_bit = bitboard & -bitboard
+        yield lowest_bit.bit_length() - 1
+        bitboard ^= lowest_bit
+
+
+# The nearest square of the mask seen from a square, looking along direction.
+def nearest_square(mask: int, direction: int) -> int:
+    # Rays going up the board meet the lowest bit first and the others the highest bit.
+    if direction > 0:
+        return (mask & -mask).bit_length() - 1
+    return mask.bit_length() - 1
+
+
+def sliding_attacks(square: int, occupied: int, directions: list[int]) -> int:
+    attacks = 0
+    for direction in directions:
+        ray = RAY_MASKS[direction][square]
+        blockers = ray & occupied
+        if blockers:
+            # The nearest blocker is the lowest bit on rays going up the board and the highest bit otherwise.
+            if direction > 0:
+                nearest = (blockers & -blockers).bit_length() - 1
+            else:
+                nearest = blockers.bit_length() - 1
+            ray ^= RAY_MASKS[direction][nearest]
+        attacks |= ray
+    return attacks
+
+
+class BitboardPosition:
+    """
+    Position stored as twelve 64 bit integers, one per side and piece type, plus occupancy masks.
+    Bit n is set when board index n holds the piece, using the same indexing as ChessEngine.board.
+    """
+
+    def __init__(self, board: list[IPiece]) -> None:
+        self.pieces = [0] * 12
+        self.occupancy = [0, 0]
+        for square, cell in enumerate(board):
+            if cell is not None:
+                self.add_piece(cell, square)
+
+    @property
+    def occupied(self) -> int:
+        return self.occupancy[0] | self.occupancy[1]
+
+    def add_piece(self, piece: IPiece, square: int) -> None:
+        bit = 1 << square
+        self.pieces[bitboard_index(piece.side, piece.pieceType)] |= bit
+        self.occupancy[piece.side.value] |= bit
+
+    def remove_piece(self, piece: IPiece, square: int) -> None:
+        mask = ~(1 << square)
+        self.pieces[bitboard_index(piece.side, piece.pieceType)] &= mask
+        self.occupancy[piece.side.value] &= mask
+
+    def get_squares(self, piece_type: PieceType, side: Side) -> list[int]:
+        return list(iterate_squares(self.pieces[bitboard_index(side, piece_type)]))
+
+    def king_square(self, side: Side) -> int:
+        kings = self.pieces[side.value * 6 + 5]
+        if not kings:
+            return -1
+        return (kings & -kings).bit_length() - 1
+
+    # Returns a mask of the pieces of by_side attacking the square.
+    # removed: pieces of by_side to ignore, used to test positions after a capture.
+    def attackers(self, square: int, by_side: Side, occupied: int = None, removed: int = 0) -> int:
+        if occupied is None:
+            occupied = self.occupied
+        pieces = self.pieces
+        base = by_side.value * 6
+        queens = pieces[base + 4]
+        defending_side = Side.BLACK if by_side is Side.WHITE else Side.WHITE
+        attackers = PAWN_ATTACK_MASKS[defending_side][square] & pieces[base]
+        attackers |= KNIGHT_MASKS[square] & pieces[base + 1]
+        attackers |= KING_MASKS[square] & pieces[base + 5]
+        attackers |= sliding_attacks(square, occupied, DIAGONAL_DIRECTIONS) & (pieces[base + 2] | queens)
+        attackers |= sliding_attacks(square, occupied, ORTHOGONAL_DIRECTIONS) & (pieces[base + 3] | queens)
+        return attackers & ~removed
+
+    def is_attacked(self, square: int, by_side: Side, occupied: int = None, removed: int = 0) -> bool:
+        return self.attackers(square, by_side, occupied, removed) != 0
+
+    # Returns a mask of every square attacked by by_side.
+    # The king of the other side does not block sliding pieces, so the squares behind it on an attacking ray count as attacked.
+    def attacked_squares(self, by_side: Side) -> int:
+        pieces = self.pieces
+        base = by_side.value * 6
+        defending_side = Side.BLACK if by_side is Side.WHITE else Side.WHITE
+        occupied = self.occupied & ~pieces[defending_side.value * 6 + 5]
+        queens = pieces[base + 4]
+        attacked = 0
+        for square in iterate_squares(pieces[base]):
+            attacked |= PAWN_ATTACK_MASKS[by_side][square]
+        for square in iterate_squares(pieces[base + 1]):
+            attacked |= KNIGHT_MASKS[square]
+        for square in iterate_squares(pieces[base + 5]):
+            attacked |= KING_MASKS[square]
+        for square in iterate_squares(pieces[base + 2] | queens):
+            attacked |= sliding_attacks(square, occupied, DIAGONAL_DIRECTIONS)
+        for square in iterate_squares(pieces[base + 3] | queens):
+            attacked |= sliding_attacks(square, occupied, ORTHOGONAL_DIRECTIONS)
+        return attacked
+
+    # Checks whether moving the piece on start to end leaves the own king out of check.
+    def __leaves_king_safe(self, enemy: Side, start: int, end: int, captured_square: int, king_square: int) -> bool:
+        captured_bit = 0 if captured_square is None else 1 << captured_square
+        occupied = (self.occupied & ~(1 << start) & ~captured_bit) | (1 << end)
+        if start == king_square:
+            king_square = end
+        return not self.is_attacked(king_square, enemy, occupied, captured_bit)
+
+    # The check mask and the pins are worked out once from the king square, as in ChessEngine.__generateLegalMoves,
+    # so only king moves and en passant look for attackers after the move.
+    def generate_legal_moves(self, board: list[IPiece], side: Side, castling_rights: int, en_passant_square: int = None) -> list[Move]:
+        enemy = Side.BLACK if side is Side.WHITE else Side.WHITE
+        base = side.value * 6
+        own = self.occupancy[side.value]
+        opponents = self.occupancy[enemy.value]
+        occupied = own | opponents
+        king_square = self.king_square(side)
+        if king_square == -1:
+            return []
+
+        moves: list[Move] = []
+        # The king does not block attacks on the squares it steps back to along a checking ray
+        without_king = occupied & ~(1 << king_square)
+        for end in iterate_squares(KING_MASKS[king_square] & ~own):
+            if not self.is_attacked(end, enemy, without_king, opponents & (1 << end)):
+                moves.append(Move(king_square, end, board[king_square], board[end]))
+
+        checkers = self.attackers(king_square, enemy)
+        # In double check only the king can move
+        if checkers & (checkers - 1):
+            return moves
+
+        # Squares a piece has to move to, capturing the checking piece or blocking its ray
+        check_mask = checkers or FULL_MASK
+        # Ray from the king up to and including the pinning piece, for every pinned piece
+        pins: dict[int, int] = {}
+        pieces = self.pieces
+        enemy_base = enemy.value * 6
+        enemy_queens = pieces[enemy_base + 4]
+        for directions, sliders in [
+            (DIAGONAL_DIRECTIONS, pieces[enemy_base + 2] | enemy_queens),
+            (ORTHOGONAL_DIRECTIONS, pieces[enemy_base + 3] | enemy_queens)
+        ]:
+            for direction in directions:
+                king_ray = RAY_MASKS[direction][king_square]
+                if not king_ray & sliders:
+                    continue
+                blockers = king_ray & occupied
+                nearest = nearest_square(blockers, direction)
+                if checkers >> nearest & 1:
+                    check_mask = king_ray ^ RAY_MASKS[direction][nearest]
+                elif own >> nearest & 1:
+                    behind = blockers & RAY_MASKS[direction][nearest]
+                    if behind:
+                        pinner = nearest_square(behind, direction)
+                        if sliders >> pinner & 1:
+                            pins[nearest] = king_ray ^ RAY_MASKS[direction][pinner]
+
+        def add_targets(start: int, targets: int) -> None:
+            for end in iterate_squares(targets & check_mask & pins.get(start, FULL_MASK)):
+                moves.append(Move(start, end, board[start], board[end]))
+
+        not_own = ~own
+        for start in iterate_squares(pieces[base + 1]):
+            add_targets(start, KNIGHT_MASKS[start] & not_own)
+        for start in iterate_squares(pieces[base + 2]):
+            add_targets(start, sliding_attacks(start, occupied, DIAGONAL_DIRECTIONS) & not_own)
+        for start in iterate_squares(pieces[base + 3]):
+            add_targets(start, sliding_attacks(start, occupied, ORTHOGONAL_DIRECTIONS) & not_own)
+        for start in iterate_squares(pieces[base + 4]):
+            add_targets(start, sliding_attacks(start, occupied, DIAGONAL_DIRECTIONS + ORTHOGONAL_DIRECTIONS) & not_own)
+
+        self.__generate_pawn_moves(board, side, enemy, en_passant_square, king_square, check_mask, pins, moves)
+        if not checkers:
+            moves.extend(self.castling_moves(board, side, castling_rights))
+        return moves
+
+    def __generate_pawn_moves(self, board: list[IPiece], side: Side, enemy: Side, en_passant_square: int, king_square: int,
+                              check_mask: int, pins: dict[int, int], moves: list[Move]) -> None:
+        forward = -8 if side is Side.WHITE else 8
+        start_row = 6 if side is Side.WHITE else 1
+        promotion_row = 0 if side is Side.WHITE else 7
+        opponents = self.occupancy[enemy.value]
+        occupied = self.occupied
+
+        for start in iterate_squares(self.pieces[side.value * 6]):
+            targets = 0
+            end = start + forward
+            if not occupied >> end & 1:
+                targets |= 1 << end
+                double = end + forward
+                if start // 8 == start_row and not occupied >> double & 1:
+                    targets |= 1 << double
+            targets |= PAWN_ATTACK_MASKS[side][start] & opponents
+
+            for end in iterate_squares(targets & check_mask & pins.get(start, FULL_MASK)):
+                if end // 8 == promotion_row:
+                    for promotion in PROMOTION_CLASSES:
+                        moves.append(PromotionMove(start, end, board[start], promotion(side), board[end]))
+                else:
+                    moves.append(Move(start, end, board[start], board[end]))
+
+            # En passant removes two pieces from the rank of the king, so it is tested on the board after the move
+            if en_passant_square is not None and PAWN_ATTACK_MASKS[side][start] >> en_passant_square & 1:
+                captured_square = en_passant_square - forward
+                if self.__leaves_king_safe(enemy, start, en_passant_square, captured_square, king_square):
+                    moves.append(Move(start, en_passant_square, board[start], board[captured_square], captured_square))
+
+    def castling_moves(self, board: list[IPiece], side: Side, castling_rights: int) -> list[Move]:
+        enemy = Side.BLACK if side is Side.WHITE else Side.WHITE
+        king_position = 60 if side is Side.WHITE else 4
+        short_right, long_right = (WHITE_SHORT_CASTLE, WHITE_LONG_CASTLE) if side is Side.WHITE else (BLACK_SHORT_CASTLE, BLACK_LONG_CASTLE)
+        king = board[king_position]
+        moves: list[Move] = []
+        if not castling_rights & (short_right | long_right):
+            return moves
+        if self.is_attacked(king_position, enemy):
+            return moves
+
+        occupied = self.occupied
+        # (rook offset, castling right, squares which must be empty, squares the king passes through)
+        for rook_offset, right, between, passing in [(3, short_right, [1, 2], [1, 2]), (-4, long_right, [-1, -2, -3], [-1, -2])]:
+            if not castling_rights & right:
+                continue
+            rook = board[king_position + rook_offset]
+            if any(occupied >> (king_position + offset) & 1 for offset in between):
+                continue
+            if any(self.is_attacked(king_position + offset, enemy) for offset in passing):
+                continue
+            direction = 1 if rook_offset > 0 else -1
+            moves.append(CastleMove(
+                king_position,
+                king_position + rook_offset,
+                king,
+                rook,
+                king_position + 2 * direction,
+                king_position + direction,
+            ))
+        return moves
@@ -6,3 +6,20 @@ def rfToIndex(rf: str) -> int:
     rank = rf[1]
     file = rf[0]
     return files.index(file) + 64 - 8 * int(rank)
+
+
+# Castling right flags, combined into a 4 bit mask.
+WHITE_SHORT_CASTLE = 1
+WHITE_LONG_CASTLE = 2
+BLACK_SHORT_CASTLE = 4
+BLACK_LONG_CASTLE = 8
+ALL_CASTLING_RIGHTS = 15
+
+# Castling rights kept when a piece moves from or to each board index.
+CASTLING_RIGHTS_KEPT = [ALL_CASTLING_RIGHTS] * 64
+CASTLING_RIGHTS_KEPT[60] = BLACK_SHORT_CASTLE | BLACK_LONG_CASTLE
+CASTLING_RIGHTS_KEPT[63] = ALL_CASTLING_RIGHTS & ~WHITE_SHORT_CASTLE
+CASTLING_RIGHTS_KEPT[56] = ALL_CASTLING_RIGHTS & ~WHITE_LONG_CASTLE
+CASTLING_RIGHTS_KEPT[4] = WHITE_SHORT_CASTLE | WHITE_LONG_CASTLE
+CASTLING_RIGHTS_KEPT[7] = ALL_CASTLING_RIGHTS & ~BLACK_SHORT_CASTLE
+CASTLING_RIGHTS_KEPT[0] = ALL_CASTLING_RIGHTS & ~BLACK_LONG_CASTLE
@@ -1,11 +1,12 @@
 import random
+import sys
+import threading
+import time
 from Enums.SideEnum import SideEnum as Side
 from Enums.PieceEnum import PieceEnum as PieceType
-from Move import Move, CastleMove, PromotionMove
+from Move import Move, CastleMove, PromotionMove, PROMOTION_CLASSES
 from Stack import Stack
 
-from copy import copy
-
 from Pieces.BasePiece import IPiece
 from Pieces.Queen import Queen
 from Pieces.Bishop import Bishop
@@ -14,24 +15,307 @@ from Pieces.Knight import Knight
 from Pieces.Rook import Rook
 from Pieces.Pawn import Pawn
 
-from Evaluator import evaluate_board
+from Evaluator import piece_contribution, combine_evaluation, piece_worth
+from Bitbase import Bitbases, DEFAULT_BITBASE_DIRECTORY, MAX_BITBASE_PIECES
+from Bitboard import BitboardPosition, iterate_squares, KNIGHT_MASKS, KING_MASKS, PAWN_ATTACK_MASKS
+from AttackTables import RAYS, KNIGHT_TARGETS, KING_TARGETS, PAWN_ATTACKS, ORTHOGONAL_DIRECTIONS, DIAGONAL_DIRECTIONS
+from TranspositionTable import TranspositionTable, Bound
+from MoveOrdering import MoveOrderer, move_key
+from SearchStats import SearchStats, Profiler
+from Zobrist import compute_hash, piece_key, en_passant_key, SIDE_KEY, CASTLING_KEYS
+from ChessUtility import (
+    WHITE_SHORT_CASTLE, WHITE_LONG_CASTLE, BLACK_SHORT_CASTLE, BLACK_LONG_CASTLE,
+    ALL_CASTLING_RIGHTS, CASTLING_RIGHTS_KEPT, indexToRF, rfToIndex, files
+)
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+# Piece classes by FEN letter, upper case letters are white pieces.
+FEN_PIECES = {"p": Pawn, "n": Knight, "b": Bishop, "r": Rook, "q": Queen, "k": King}
+# FEN letter of every piece, pieces being shared instances.
+FEN_LETTERS = {
+    pieceClass(side): letter.upper() if side is Side.WHITE else letter
+    for letter, pieceClass in FEN_PIECES.items() for side in Side
+}
+# FEN letters of the castling rights, in the order FEN writes them.
+FEN_CASTLING = [("K", WHITE_SHORT_CASTLE), ("Q", WHITE_LONG_CASTLE), ("k", BLACK_SHORT_CASTLE), ("q", BLACK_LONG_CASTLE)]
+# Side, king square and rook square each castling right needs.
+CASTLING_SQUARES = {
+    WHITE_SHORT_CASTLE: (Side.WHITE, 60, 63),
+    WHITE_LONG_CASTLE: (Side.WHITE, 60, 56),
+    BLACK_SHORT_CASTLE: (Side.BLACK, 4, 7),
+    BLACK_LONG_CASTLE: (Side.BLACK, 4, 0),
+}
+
+# Sliding directions of each piece type.
+SLIDING_DIRECTIONS = {
+    PieceType.BISHOP: DIAGONAL_DIRECTIONS,
+    PieceType.ROOK: ORTHOGONAL_DIRECTIONS,
+    PieceType.QUEEN: DIAGONAL_DIRECTIONS + ORTHOGONAL_DIRECTIONS,
+}
+
+# Nodes a single quiescence search may visit before it settles for the static evaluation.
+QUIESCENCE_NODE_LIMIT = 2000
+# Captures which cannot lift the evaluation within this margin of the window are not searched by quiescence.
+DELTA_MARGIN = 2
+
+# Each search logs its statistics as JSON to the "Engine" logger, at INFO when it ends and at DEBUG after every iteration.
+LOG_INFO = 20
+LOG_DEBUG = 10
+
+# Bound of every search window, larger than any evaluation.
+INFINITY = 99999
+# Score of a checkmate, before adding the remaining depth.
+MATE_SCORE = 90000
+# Deepest iteration of a search limited only by time or nodes.
+MAX_SEARCH_DEPTH = 64
+# Root moves scoring within this margin of the best move are searched exactly, so ties can be found.
+TIE_MARGIN = 0.001
+# Width of the windows which only ask whether a score is above or below a bound.
+SCOUT_WINDOW = 0.0001
+
+# Null move pruning: depth taken off the search after passing, and the depth a node needs for it to be tried.
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = 3
+# Sides with at most this many pieces besides pawns and the king are prone to zugzwang,
+# so a null move cutoff is only trusted once a reduced search of the real moves confirms it.
+NULL_MOVE_VERIFY_PIECES = 1
+# Late move reductions: quiet moves ordered at least this late, at nodes of at least this depth, are searched shallower first.
+LATE_MOVE_INDEX = 3
+LATE_MOVE_MIN_DEPTH = 3
+LATE_MOVE_REDUCTION = 1
+
+
+# Mate scores count the depth remaining at the mated position, which depends on the depth the search started with.
+# The transposition table stores them counted from the node instead, as MATE_SCORE less the plies to the mate,
+# so an entry scores the same mate when it is reached again at a different depth.
+def score_to_table(score, depth: int):
+    if score >= MATE_SCORE:
+        return score - depth
+    if score <= -MATE_SCORE:
+        return score + depth
+    return score
+
+
+def score_from_table(score, depth: int):
+    if score > MATE_SCORE - MAX_SEARCH_DEPTH:
+        return score + depth
+    if score < -(MATE_SCORE - MAX_SEARCH_DEPTH):
+        return score - depth
+    return score
+
+
+# Logging can only have been set up by a program which imported it, so logging and json are not imported before that.
+# This keeps them out of the startup time of the UCI front end.
+# report: returns the record to log, only called when the level is enabled.
+def log_search(level: int, message: str, report) -> None:
+    logging = sys.modules.get("logging")
+    if logging is None:
+        return
+    logger = logging.getLogger(__name__)
+    if logger.isEnabledFor(level):
+        import json
+        logger.log(level, message, json.dumps(report()))
+
+
+class SearchAborted(Exception):
+    pass
+
 
 class ChessEngine:
 
-    def __init__(self) -> None:
+    # use_bitboards: keeps a BitboardPosition in sync with the board and uses it for move generation and evaluation.
+    # debug_hash: checks the incrementally updated zobrist key against a full recomputation after every move.
+    # tt_size_mb: memory cap of the transposition table used by the search.
+    # use_positional: adds the piece-square tables to the material evaluation.
+    # use_quiescence: resolves captures at the leaves of the search before evaluating.
+    # quiescence_node_limit: nodes each quiescence search may visit.
+    # quiescence_check_evasions: searches every move out of check in quiescence instead of standing pat.
+    # opening_book: path of an opening book file, positions found in it are played from the book without searching.
+    # bitbase_directory: directory of the endgame bitbases probed by the search, None to not probe them.
+    # use_null_move: prunes nodes where passing the turn still fails high, verified in positions prone to zugzwang.
+    # use_late_move_reductions: searches late quiet moves shallower first, and fully again only if they beat alpha.
+    def __init__(self, use_bitboards: bool = False, debug_hash: bool = False, tt_size_mb: float = 16, use_positional: bool = False,
+                 use_quiescence: bool = True, quiescence_node_limit: int = QUIESCENCE_NODE_LIMIT, quiescence_check_evasions: bool = True,
+                 opening_book: str = None, bitbase_directory: str = DEFAULT_BITBASE_DIRECTORY,
+                 use_null_move: bool = True, use_late_move_reductions: bool = True) -> None:
         self.SideToPlay: Side = Side.WHITE
+        # Holds (move, castling rights, en passant square, halfmove clock) records, with the state from before the move.
         self.__MoveHistory = Stack()
+        self.castlingRights = ALL_CASTLING_RIGHTS
+        self.enPassantSquare: int = None
+        # Moves since the last capture or pawn move, and the number of the move being played, as in FEN.
+        self.halfmoveClock = 0
+        self.fullmoveNumber = 1
         self.turnCount = 0
         self.board = []
         self.checkmated = False
         self.stalemated = False
         self.board = self.__InitBoard()
+        self.bitboards: BitboardPosition = BitboardPosition(self.board) if use_bitboards else None
+        self.debug_hash = debug_hash
+        self.use_positional = use_positional
+        self.use_quiescence = use_quiescence
+        self.quiescence_node_limit = quiescence_node_limit
+        self.quiescence_check_evasions = quiescence_check_evasions
+        self.__quiescenceNodes = 0
+        self.use_null_move = use_null_move
+        self.use_late_move_reductions = use_late_move_reductions
+        self.opening_book = None
+        if opening_book is not None:
+            from OpeningBook import OpeningBook
+            self.opening_book = OpeningBook(opening_book)
+        # Tables which have not been generated are left out, without any the search does not probe.
+        self.bitbase_directory = bitbase_directory
+        self.bitbases = Bitbases(bitbase_directory) if bitbase_directory is not None else None
+        if not self.bitbases:
+            self.bitbases = None
+        self.__hash = self.compute_hash()
+        self.__resetEvaluation()
+        self.__resetPieceLists()
+        # Attacked squares of each side, for the position with the zobrist key __attackedKey.
+        self.__attackedKey: int = None
+        self.__attacked: list[int] = [None, None]
+        # Legal moves of the position with the zobrist key __legalMovesKey.
+        self.__legalMovesKey: int = None
+        self.__legalMoves: list[Move] = []
+        self.transposition_table = TranspositionTable(tt_size_mb)
+        self.move_orderer = MoveOrderer()
+        self.nodes = 0
+        self.__rootHistory = 0
+        self.__deadline: float = None
+        self.__nodeLimit: int = None
+        self.__stopEvent: threading.Event = None
+        # Depth of the iteration search_moves is working on, read by the interface while it searches on another thread.
+        self.current_depth = 0
+        # Worker processes of the parallel root search, started by the first search asking for them.
+        self.__rootPool = None
+        # Evaluation and best moves of the last search_moves call.
+        self.last_evaluation = None
+        self.last_best_moves: list[Move] = []
+        # Statistics of the last search_moves call, and the profiler timing hot methods, if profiling is on.
+        self.stats = SearchStats()
+        self.profiler: Profiler = None
 
         # Board movement directions in one dimensional array.
         self.__HorizontalMovement = [-1, 1]
         self.__VerticalMovement = [-8, 8]
         self.__DiagonalMovement = [-7, -9, 7, 9]
 
+    # Replaces the position with the given board, side to play and state, clearing the move history.
+    def load_position(self, board: list[IPiece], side_to_play: Side, castling_rights: int = 0, en_passant_square: int = None,
+                      halfmove_clock: int = 0, fullmove_number: int = 1) -> None:
+        self.board = board
+        self.SideToPlay = side_to_play
+        self.castlingRights = castling_rights
+        self.enPassantSquare = en_passant_square
+        self.halfmoveClock = halfmove_clock
+        self.fullmoveNumber = fullmove_number
+        self.__MoveHistory = Stack()
+        self.checkmated = False
+        self.stalemated = False
+        if self.bitboards is not None:
+            self.bitboards = BitboardPosition(self.board)
+        self.__hash = self.compute_hash()
+        self.__resetEvaluation()
+        self.__resetPieceLists()
+        self.__attackedKey = None
+        self.__legalMovesKey = None
+
+    # Turns timing of the methods in SearchStats.PROFILED_METHODS on or off. Nothing is timed, or slowed down, while it is off.
+    def set_profiling(self, enabled: bool) -> None:
+        if enabled and self.profiler is None:
+            self.profiler = Profiler()
+            self.profiler.install(self)
+        elif not enabled and self.profiler is not None:
+            self.profiler.uninstall()
+            self.profiler = None
+
+    # Creates an engine set up with the position of a FEN string, the options are passed on to the constructor.
+    @classmethod
+    def from_fen(cls, fen: str, **options) -> "ChessEngine":
+        engine = cls(**options)
+        engine.load_fen(fen)
+        return engine
+
+    # Replaces the position with the one of a FEN string. The move clocks may be left out, as EPD does.
+    # Raises ValueError if the string is not valid FEN.
+    def load_fen(self, fen: str) -> None:
+        fields = fen.split()
+        if len(fields) not in (4, 6):
+            raise ValueError(f"FEN needs 4 or 6 fields: {fen}")
+        placement, side, castling, en_passant = fields[:4]
+
+        rows = placement.split("/")
+        board: list[IPiece] = []
+        for row in rows:
+            row_start = len(board)
+            for character in row:
+                if character.isdigit():
+                    board.extend([None] * int(character))
+                elif character.lower() in FEN_PIECES:
+                    board.append(FEN_PIECES[character.lower()](Side.WHITE if character.isupper() else Side.BLACK))
+                else:
+                    raise ValueError(f"Invalid piece {character} in FEN: {fen}")
+            if len(board) - row_start != 8:
+                raise ValueError(f"Invalid piece placement in FEN: {fen}")
+        if len(rows) != 8:
+            raise ValueError(f"Invalid piece placement in FEN: {fen}")
+
+        if side not in ("w", "b"):
+            raise ValueError(f"Invalid side to play in FEN: {fen}")
+        castling_rights = 0
+        if castling != "-":
+            for character in castling:
+                flags = [flag for letter, flag in FEN_CASTLING if letter == character]
+                if not flags:
+                    raise ValueError(f"Invalid castling rights in FEN: {fen}")
+                castling_rights |= flags[0]
+        # Move generation expects one king a side, and the king and rook of every castling right on their starting squares.
+        for player in Side:
+            kings = [cell for cell in board if cell is not None and cell.side is player and cell.pieceType is PieceType.KING]
+            if len(kings) != 1:
+                raise ValueError(f"FEN needs exactly one {player.name.lower()} king: {fen}")
+        for flag, (player, king_square, rook_square) in CASTLING_SQUARES.items():
+            if not castling_rights & flag:
+                continue
+            king, rook = board[king_square], board[rook_square]
+            if king is None or king.side is not player or king.pieceType is not PieceType.KING \
+                    or rook is None or rook.side is not player or rook.pieceType is not PieceType.ROOK:
+                raise ValueError(f"Castling rights without the king and rook on their starting squares in FEN: {fen}")
+        en_passant_square = None
+        if en_passant != "-":
+            if len(en_passant) != 2 or en_passant[0] not in files or en_passant[1] not in "36":
+                raise ValueError(f"Invalid en passant square in FEN: {fen}")
+            en_passant_square = rfToIndex(en_passant)
+        halfmove_clock, fullmove_number = 0, 1
+        if len(fields) == 6:
+            if not fields[4].isdigit() or not fields[5].isdigit():
+                raise ValueError(f"Invalid move clocks in FEN: {fen}")
+            halfmove_clock, fullmove_number = int(fields[4]), int(fields[5])
+
+        self.load_position(board, Side.WHITE if side == "w" else Side.BLACK, castling_rights, en_passant_square,
+                           halfmove_clock, fullmove_number)
+
+    # Writes the position, its state and move clocks as a FEN string.
+    def to_fen(self) -> str:
+        rows = []
+        for row in range(8):
+            text = ""
+            empty = 0
+            for cell in self.board[row * 8:row * 8 + 8]:
+                if cell is None:
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                text += FEN_LETTERS[cell]
+            rows.append(text + (str(empty) if empty else ""))
+        castling = "".join(letter for letter, flag in FEN_CASTLING if self.castlingRights & flag) or "-"
+        en_passant = indexToRF(self.enPassantSquare) if self.enPassantSquare is not None else "-"
+        side = "w" if self.SideToPlay is Side.WHITE else "b"
+        return f"{'/'.join(rows)} {side} {castling} {en_passant} {self.halfmoveClock} {self.fullmoveNumber}"
+
     # Returns a fresh board
     def __InitBoard(self) -> list[IPiece]:
         board = [
@@ -52,13 +336,16 @@ class ChessEngine:
 
     # Returns a list of the requested pieces and the respective index on the board
     def getPieces(self, pieceType: PieceType, side: Side) -> list[tuple[IPiece, int]]:
-        pieces: list[tuple[IPiece, int]] = []
-        for i,cell in enumerate(self.board):
-            if cell is None: 
-                continue
-            if (cell.pieceType == pieceType) and (cell.side == side):
-                pieces.append((cell, i))
-        return pieces
+        if self.bitboards is not None:
+            return [(self.board[i], i) for i in self.bitboards.get_squares(pieceType, side)]
+        if pieceType is PieceType.KING:
+            king = self.kingSquares[side.value]
+            return [] if king is None else [(self.board[king], king)]
+        return [(self.board[i], i) for i in self.pieceSquares[side.value] if self.board[i].pieceType is pieceType]
+
+    # Returns the board index of the king of the side, or None if it has no king.
+    def king_square(self, side: Side) -> int:
+        return self.kingSquares[side.value]
 
     def displayBoard(self) -> str:
         display = ""
@@ -72,32 +359,121 @@ class ChessEngine:
     def switchSide(self) -> None:
         self.SideToPlay = Side.WHITE if self.SideToPlay == Side.BLACK else Side.BLACK
 
+    # Places a piece (or None) on the board, keeping the bitboards, zobrist key and evaluation totals in sync.
+    def __setSquare(self, index: int, piece: IPiece) -> None:
+        previous = self.board[index]
+        if previous is not None:
+            self.__hash ^= piece_key(previous, index)
+            material, positional = piece_contribution(previous, index)
+            self.material -= material
+            self.positional -= positional
+            if self.bitboards is not None:
+                self.bitboards.remove_piece(previous, index)
+            self.pieceSquares[previous.side.value].discard(index)
+            if self.kingSquares[previous.side.value] == index:
+                self.kingSquares[previous.side.value] = None
+        if piece is not None:
+            self.__hash ^= piece_key(piece, index)
+            material, positional = piece_contribution(piece, index)
+            self.material += material
+            self.positional += positional
+            if self.bitboards is not None:
+                self.bitboards.add_piece(piece, index)
+            self.pieceSquares[piece.side.value].add(index)
+            if piece.pieceType is PieceType.KING:
+                self.kingSquares[piece.side.value] = index
+        self.board[index] = piece
+
+    # Recomputes the running material and piece-square totals from the board.
+    def __resetEvaluation(self) -> None:
+        self.material = 0
+        self.positional = 0
+        for i, cell in enumerate(self.board):
+            if cell is not None:
+                material, positional = piece_contribution(cell, i)
+                self.material += material
+                self.positional += positional
+
+    # Rebuilds the board indexes of each side's pieces, and of their kings, from the board.
+    def __resetPieceLists(self) -> None:
+        self.pieceSquares: list[set[int]] = [set(), set()]
+        self.kingSquares: list[int] = [None, None]
+        for i, cell in enumerate(self.board):
+            if cell is not None:
+                self.pieceSquares[cell.side.value].add(i)
+                if cell.pieceType is PieceType.KING:
+                    self.kingSquares[cell.side.value] = i
+
+    # 64 bit zobrist key of the position, covering pieces, side to play, castling rights and en passant file.
+    @property
+    def zobrist_key(self) -> int:
+        return self.__hash
+
+    def compute_hash(self) -> int:
+        return compute_hash(self.board, self.SideToPlay, self.castling_rights(), self.en_passant_target())
+
+    # Returns the castling rights as a mask of the flags in ChessUtility.
+    def castling_rights(self) -> int:
+        return self.castlingRights
+
+    # Returns the square a pawn can capture en passant onto, if the previous move was a double pawn push.
+    def en_passant_target(self) -> int:
+        return self.enPassantSquare
+
+    # Returns the most recently made move, or None at the start of the history or after a null move.
+    def last_move(self) -> Move:
+        record = self.__MoveHistory.top()
+        return record[0] if record is not None else None
+
+    # Sets the castling rights and en passant square, updating their part of the zobrist key.
+    def __setState(self, castlingRights: int, enPassantSquare: int) -> None:
+        self.__hash ^= CASTLING_KEYS[self.castlingRights] ^ CASTLING_KEYS[castlingRights]
+        self.__hash ^= en_passant_key(self.enPassantSquare) ^ en_passant_key(enPassantSquare)
+        self.castlingRights = castlingRights
+        self.enPassantSquare = enPassantSquare
+
+    # Hands the turn over once the board and state of a move are updated.
+    def __passTurn(self) -> None:
+        self.switchSide()
+        self.__hash ^= SIDE_KEY
+        if self.debug_hash and self.__hash != self.compute_hash():
+            raise AssertionError(f"Zobrist key out of sync: {self.__hash:016x} != {self.compute_hash():016x}")
+
+    # Evaluation from the running totals kept by makeMove and unmakeMove, positive favours white.
+    def evaluate(self):
+        return combine_evaluation(self.material, self.positional, self.use_positional)
+
     # Makes a move on the board and returns whether the operation failed or succeeded.
     def makeMove(self, move: Move) -> bool:
         try:
             initialCell = self.board[move.startPosition]
             # Selected nothing to move
-            self.board[move.startPosition] = None
-            self.board[move.capturedPiecePosition] = None
-            self.board[move.endPosition] = initialCell
+            self.__setSquare(move.startPosition, None)
+            self.__setSquare(move.capturedPiecePosition, None)
+            self.__setSquare(move.endPosition, initialCell)
             if isinstance(move, CastleMove):
-                self.board[move.rook_start_position] = None
-                self.board[move.rook_end_position] = move.rook_piece
-                move.rook_piece.hasMoved = True
-                self.__MoveHistory.push(move)
-                self.switchSide()
-                return True
+                self.__setSquare(move.rook_start_position, None)
+                self.__setSquare(move.rook_end_position, move.rook_piece)
             if isinstance(move, PromotionMove):
-                self.board[move.endPosition] = move.promoted_piece
-                move.promoted_piece.hasMoved = True
-                self.__MoveHistory.push(move)
-                self.switchSide()
-                return True
-            # Add move onto the move history.
-            self.__MoveHistory.push(move)
-            self.board[move.endPosition].hasMoved = True
+                self.__setSquare(move.endPosition, move.promoted_piece)
+
+            # Moving the king or a rook, or capturing a rook, loses the matching castling rights.
+            castlingRights = self.castlingRights & CASTLING_RIGHTS_KEPT[move.startPosition] & CASTLING_RIGHTS_KEPT[move.endPosition]
+            enPassantSquare = None
+            if initialCell.pieceType is PieceType.PAWN and abs(move.endPosition - move.startPosition) == 16:
+                enPassantSquare = (move.startPosition + move.endPosition) // 2
+
+            # Add move onto the move history, with the state needed to unmake it.
+            self.__MoveHistory.push((move, self.castlingRights, self.enPassantSquare, self.halfmoveClock))
+            self.__setState(castlingRights, enPassantSquare)
+            if initialCell.pieceType is PieceType.PAWN or move.capturedPieceMoved is not None:
+                self.halfmoveClock = 0
+            else:
+                self.halfmoveClock += 1
+            if self.SideToPlay is Side.BLACK:
+                self.fullmoveNumber += 1
             # Switch playing sides
-            self.switchSide()
+            self.__passTurn()
             return True
         except:
             return False
@@ -108,29 +484,49 @@ class ChessEngine:
             return False
 
         # Gets the most recent move
-        previousMove: Move = self.__MoveHistory.top()
+        previousMove, castlingRights, enPassantSquare, halfmoveClock = self.__MoveHistory.top()
+        if previousMove is None:
+            self.__MoveHistory.pop()
+            self.__setState(castlingRights, enPassantSquare)
+            self.halfmoveClock = halfmoveClock
+            self.__passTurn()
+            if self.SideToPlay is Side.BLACK:
+                self.fullmoveNumber -= 1
+            return True
 
-        self.board[previousMove.startPosition] = previousMove.pieceMoved
-        self.board[previousMove.endPosition] = None
-        self.board[previousMove.capturedPiecePosition] = previousMove.capturedPieceMoved
+        self.__setSquare(previousMove.startPosition, previousMove.pieceMoved)
+        self.__setSquare(previousMove.endPosition, None)
+        self.__setSquare(previousMove.capturedPiecePosition, previousMove.capturedPieceMoved)
 
         if isinstance(previousMove, CastleMove):
-            self.board[previousMove.rook_end_position] = None
-            self.board[previousMove.rook_start_position] = previousMove.rook_piece
-            previousMove.rook_piece.hasMoved = False
+            self.__setSquare(previousMove.rook_end_position, None)
+            self.__setSquare(previousMove.rook_start_position, previousMove.rook_piece)
 
         if isinstance(previousMove, PromotionMove):
-            self.board[previousMove.endPosition] = previousMove.capturedPieceMoved
-            self.board[previousMove.startPosition] = previousMove.initial_pawn
+            self.__setSquare(previousMove.endPosition, previousMove.capturedPieceMoved)
+            self.__setSquare(previousMove.startPosition, previousMove.initial_pawn)
 
-        # Removes the unmade move
+        # Removes the unmade move and restores the state from before it
         self.__MoveHistory.pop()
+        self.__setState(castlingRights, enPassantSquare)
+        self.halfmoveClock = halfmoveClock
 
         # Switches the side
-        self.switchSide()
+        self.__passTurn()
+        if self.SideToPlay is Side.BLACK:
+            self.fullmoveNumber -= 1
 
         return True
 
+    # Passes the turn without moving, for null move pruning. The history records it with no move, unmakeMove takes it back.
+    def makeNullMove(self) -> None:
+        self.__MoveHistory.push((None, self.castlingRights, self.enPassantSquare, self.halfmoveClock))
+        self.__setState(self.castlingRights, None)
+        self.halfmoveClock += 1
+        if self.SideToPlay is Side.BLACK:
+            self.fullmoveNumber += 1
+        self.__passTurn()
+
     """
     - boardIndex: The starting position on the board as an integer index.
     - direction: The direction of movement as an integer offset from the current index.
@@ -140,58 +536,31 @@ class ChessEngine:
     - xrayDepth: Passes through first piece until contact with another
     """
     def raycast(self, boardIndex: int, direction: int, includeAllies:bool = False, includeContact:bool = True, lifespan:int= 8, xray: bool = False) -> list[Move]:
-        currentIndex = boardIndex
+        piece = self.board[boardIndex]
         locations = []
-        while lifespan > 0:
-            currentIndexInRow = currentIndex % 8
-            currentIndexInColumn = currentIndex // 8
-            nextIndex = currentIndex + direction
-            # Check if out of board
-            if not 0 <= nextIndex <= 63:
-                break
-
-            nextIndexInRow = nextIndex % 8
-            nextIndexInColumn = nextIndex // 8
-
-            # Checks if it "jumps" rows or columns
-            if abs(nextIndexInRow - currentIndexInRow) > 1 or abs(nextIndexInColumn - currentIndexInColumn) > 1:
-                break
-
+        # The precomputed ray already stops at the edge of the board.
+        for nextIndex in RAYS[direction][boardIndex][:lifespan]:
             # Checks if next cell contains a piece
             nextCell = self.board[nextIndex]
             if nextCell is not None:
                 # Checks if the cell is same team
-                if not includeAllies and nextCell.side == self.board[boardIndex].side:
+                if not includeAllies and nextCell.side == piece.side:
                     break
 
                 if includeContact:
-                    move = Move(boardIndex, nextIndex, copy(self.board[boardIndex]), copy(nextCell))
+                    move = Move(boardIndex, nextIndex, piece, nextCell)
                     locations.append(move)
                     if xray:
                         xray = False
-                        currentIndex = nextIndex
-                        lifespan -= 1
                         continue
                 
                 if not xray:
                     break
 
-            move = Move(boardIndex, nextIndex, copy(self.board[boardIndex]), copy(nextCell))
+            move = Move(boardIndex, nextIndex, piece, nextCell)
             locations.append(move)
-            currentIndex = nextIndex
-            lifespan -= 1
         return locations
     
-    # returns attacked piece, attacking piece (pinned piece, pinning piece)
-    def get_xray_piece(self, board_index: int , direction: int):
-        moves = self.raycast(board_index, direction, True, xray=True)
-        
-        pieces = []
-        for move in moves:
-            if move.capturedPieceMoved is not None:
-                pieces.append(move.endPosition)
-        return pieces
-
     # Generates a list of indexes on the board the piece can go
     def generate_rook_moves(self, boardIndex: int, include_self_attacks:bool):
         moves = []
@@ -220,44 +589,32 @@ class ChessEngine:
         return moves
 
     def generate_king_moves(self, boardIndex: int, include_self_attacks: bool):
-        moves = []
-        for direction in self.__DiagonalMovement + self.__HorizontalMovement + self.__VerticalMovement:
-            moves.extend(self.raycast(boardIndex, direction, includeAllies=include_self_attacks, lifespan=1))
-
-        return moves
+        return self.generate_leaper_moves(boardIndex, KING_TARGETS[boardIndex], include_self_attacks)
 
     def generate_knight_moves(self, boardIndex: int, include_self_attacks: bool):
-        moves = []
-        directions = [17, 15, 10, 6, -17, -15, -10, -6]
-        currentIndexInRow = boardIndex % 8
-        currentIndexInColumn = boardIndex // 8
-        for direction in directions:
-            nextIndex = boardIndex + direction
-            # Check if out of board
-            if not 0 <= nextIndex <= 63:
-                continue
-
-            nextIndexInRow = nextIndex % 8
-            nextIndexInColumn = nextIndex // 8
-            # Checks if it "jumps" rows or columns
-            if abs(nextIndexInRow - currentIndexInRow) > 2 or abs(nextIndexInColumn - currentIndexInColumn) > 2:
-                continue
+        return self.generate_leaper_moves(boardIndex, KNIGHT_TARGETS[boardIndex], include_self_attacks)
 
+    # Generates single step moves onto the precomputed target squares of a king or knight
+    def generate_leaper_moves(self, boardIndex: int, targets: list[int], include_self_attacks: bool):
+        moves = []
+        piece = self.board[boardIndex]
+        for nextIndex in targets:
             # Checks if next cell contains a piece
             nextCell = self.board[nextIndex]
             if nextCell is not None:
                 # Checks if the cell is same team
-                if not include_self_attacks and nextCell.side == self.board[boardIndex].side:
+                if not include_self_attacks and nextCell.side == piece.side:
                     continue
 
-            move = Move(boardIndex, nextIndex, copy(self.board[boardIndex]), copy(nextCell))
+            move = Move(boardIndex, nextIndex, piece, nextCell)
             moves.append(move)
         return moves
 
     def generate_pawn_moves(self, boardIndex: int, include_self_attacks: bool, include_pawn_attacks=False):
         # Gets information of piece from the board
-        hasMoved = self.board[boardIndex].hasMoved
         side = self.board[boardIndex].side
+        # Pawns which have not moved are still on their starting row
+        hasMoved = boardIndex // 8 != (6 if side is Side.WHITE else 1)
 
         moves = []
         sideMultiplier = 1 if side == Side.BLACK else -1
@@ -270,22 +627,19 @@ class ChessEngine:
         
 
         # Taking pieces
-        takingDirections = [7, 9]
-        for direction in takingDirections:
-            # Adjust for which side the pawn is on
-            direction *= sideMultiplier
-            move: list[Move] = self.raycast(boardIndex, direction, includeContact=True, includeAllies=include_self_attacks, lifespan=1)
-            # Check if potential move is possible
-            if len(move) == 0:
+        for attackedIndex in PAWN_ATTACKS[side][boardIndex]:
+            attackedCell = self.board[attackedIndex]
+            # Checks if the cell is same team
+            if attackedCell is not None and not include_self_attacks and attackedCell.side == side:
                 continue
-            # Gets the move, raycast returns a list but there will only be one in this case.
-            move: Move = move[0]
+            move = Move(boardIndex, attackedIndex, self.board[boardIndex], attackedCell)
             # Checks if the move location is an enemy piece, if yes add to move list.
             if move.capturedPieceMoved is not None or include_pawn_attacks:
                 #checks if it is an end row
                 if (move.capturedPiecePosition // 8 == 0 and self.SideToPlay is Side.WHITE) or (move.capturedPiecePosition // 8 == 7 and self.SideToPlay is Side.BLACK):
-                    moves.append(PromotionMove(boardIndex, move.capturedPiecePosition,
-                                 copy(self.board[boardIndex]), copy(Queen(self.SideToPlay)), copy((move.capturedPieceMoved))))
+                    for promotion in PROMOTION_CLASSES:
+                        moves.append(PromotionMove(boardIndex, move.capturedPiecePosition,
+                                     self.board[boardIndex], promotion(self.SideToPlay), move.capturedPieceMoved))
                 else:
                     moves.append(move)
 
@@ -295,33 +649,100 @@ class ChessEngine:
         2. En passant must be available only immediately after the pawn makes the two-square move,
         if the player does not capture en passant on the next move, the opportunity is lost.
         """
-        mostRecentMove: Move = self.__MoveHistory.top()
-        # Checks if previous move exists
-        if mostRecentMove:
-            # Checks if the piece type is pawn
-            if mostRecentMove.pieceMoved.pieceType is PieceType.PAWN and mostRecentMove.pieceMoved.side is not side:
-                # Check if they are in the same row
-                if mostRecentMove.endPosition // 8 == boardIndex // 8:
-                    # Check if is next to eachother and is dual move
-                    if abs((mostRecentMove.endPosition % 8) - (boardIndex % 8)) == 1 and abs(mostRecentMove.startPosition - mostRecentMove.endPosition) // 8 == 2:
-                        a = Move(boardIndex,mostRecentMove.endPosition + 8 * sideMultiplier, copy(self.board[boardIndex]), mostRecentMove.pieceMoved, mostRecentMove.endPosition)
-                        moves.append(a)
+        if side is self.SideToPlay and self.enPassantSquare in PAWN_ATTACKS[side][boardIndex]:
+            capturedPosition = self.enPassantSquare - 8 * sideMultiplier
+            moves.append(Move(boardIndex, self.enPassantSquare, self.board[boardIndex], self.board[capturedPosition], capturedPosition))
         
         # Promotion
         if len(linear_pawn_movement) != 0:
             if (boardIndex // 8 == 1 and self.SideToPlay is Side.WHITE) or (boardIndex // 8 == 6 and self.SideToPlay is Side.BLACK):
-                mx = PromotionMove(boardIndex, boardIndex + 8 *sideMultiplier, copy(self.board[boardIndex]), copy(Queen(self.SideToPlay)))
-                moves.append(mx)
+                for promotion in PROMOTION_CLASSES:
+                    mx = PromotionMove(boardIndex, boardIndex + 8 *sideMultiplier, self.board[boardIndex], promotion(self.SideToPlay))
+                    moves.append(mx)
             else:
                 moves.extend(linear_pawn_movement)
         return moves
 
-    def is_attacked(self, board_indexes: list[int], enemy_moves: list[Move] = [],  attacking_piece_board_index: list[int] = []) -> list[bool]:
+    # Returns the board indexes of the pieces of by_side attacking the square.
+    # Looks outward from the square along the knight, king, pawn and sliding rays instead of generating the enemy moves.
+    def attackers(self, square: int, by_side: Side) -> list[int]:
+        if self.bitboards is not None:
+            return list(iterate_squares(self.bitboards.attackers(square, by_side)))
+        board = self.board
+        defending_side = Side.BLACK if by_side is Side.WHITE else Side.WHITE
+        found = []
+        for targets, pieceType in [
+            (KNIGHT_TARGETS[square], PieceType.KNIGHT),
+            (KING_TARGETS[square], PieceType.KING),
+            # A pawn attacks the square from where a defending pawn on the square would attack
+            (PAWN_ATTACKS[defending_side][square], PieceType.PAWN)
+        ]:
+            for index in targets:
+                cell = board[index]
+                if cell is not None and cell.side is by_side and cell.pieceType is pieceType:
+                    found.append(index)
+        for directions, sliders in [
+            (ORTHOGONAL_DIRECTIONS, (PieceType.ROOK, PieceType.QUEEN)),
+            (DIAGONAL_DIRECTIONS, (PieceType.BISHOP, PieceType.QUEEN))
+        ]:
+            for direction in directions:
+                for index in RAYS[direction][square]:
+                    cell = board[index]
+                    if cell is None:
+                        continue
+                    if cell.side is by_side and cell.pieceType in sliders:
+                        found.append(index)
+                    break
+        return found
+
+    # Returns a mask with bit n set when board index n is attacked by by_side, worked out once per position.
+    # The king of the other side does not block sliding pieces, so the squares behind it on an attacking ray count as attacked.
+    def attacked_squares(self, by_side: Side) -> int:
+        if self.__attackedKey != self.__hash:
+            self.__attackedKey = self.__hash
+            self.__attacked = [None, None]
+        attacked = self.__attacked[by_side.value]
+        if attacked is not None:
+            return attacked
+
+        if self.bitboards is not None:
+            attacked = self.bitboards.attacked_squares(by_side)
+        else:
+            board = self.board
+            defending_king = self.kingSquares[1 - by_side.value]
+            attacked = 0
+            for boardIndex in self.pieceSquares[by_side.value]:
+                pieceType = board[boardIndex].pieceType
+                if pieceType is PieceType.PAWN:
+                    attacked |= PAWN_ATTACK_MASKS[by_side][boardIndex]
+                elif pieceType is PieceType.KNIGHT:
+                    attacked |= KNIGHT_MASKS[boardIndex]
+                elif pieceType is PieceType.KING:
+                    attacked |= KING_MASKS[boardIndex]
+                else:
+                    for direction in SLIDING_DIRECTIONS[pieceType]:
+                        for index in RAYS[direction][boardIndex]:
+                            attacked |= 1 << index
+                            if board[index] is not None and index != defending_king:
+                                break
+        self.__attacked[by_side.value] = attacked
+        return attacked
+
+    # Returns whether each of the board indexes is attacked by the side not to play.
+    # enemy_moves: checks against these moves instead, as generated by generate_all_moves.
+    # attacking_piece_board_index: filled with the board indexes of the attacking pieces.
+    def is_attacked(self, board_indexes: list[int], enemy_moves: list[Move] = None, attacking_piece_board_index: list[int] = None) -> list[bool]:
+        if attacking_piece_board_index is None:
+            attacking_piece_board_index = []
+        if not enemy_moves:
+            enemy = Side.BLACK if self.SideToPlay is Side.WHITE else Side.WHITE
+            states = []
+            for board_index in board_indexes:
+                attackers = self.attackers(board_index, enemy)
+                attacking_piece_board_index.extend(attackers)
+                states.append(len(attackers) != 0)
+            return states
         states: list[bool] = [False] * len(board_indexes)
-        if len(enemy_moves) == 0:
-            enemy_moves = self.generate_all_moves(
-                Side.BLACK if self.SideToPlay is Side.WHITE else Side.WHITE, False, True)
-                
         for move in enemy_moves:
             if move.capturedPiecePosition in board_indexes:
                 if move.pieceMoved.pieceType is PieceType.PAWN:
@@ -334,7 +755,7 @@ class ChessEngine:
 
     def in_check(self, king_position: int = None) -> tuple[bool, int]:
         if king_position is None:
-            king = self.getPieces(PieceType.KING, self.SideToPlay)[0][1]
+            king = self.kingSquares[self.SideToPlay.value]
         else:
             king = king_position
         attacked_by = []
@@ -342,53 +763,55 @@ class ChessEngine:
         return (is_attacked[0], attacked_by)
 
     def castling_moves(self) -> list[Move]:
-        kings = self.getPieces(PieceType.KING, self.SideToPlay)
-        if len(kings) == 0:
+        if self.bitboards is not None:
+            return self.bitboards.castling_moves(self.board, self.SideToPlay, self.castlingRights)
+        king_position = self.kingSquares[self.SideToPlay.value]
+        if king_position is None:
             return []
-        king: list[tuple[IPiece, int]] = kings[0]
-
-        king_piece, king_position = king
+        king_piece = self.board[king_position]
 
         moves: list[Move] = []
         short_castle_allowed = long_castle_allowed = False
         short_rook = long_rook = None
+        short_right, long_right = (WHITE_SHORT_CASTLE, WHITE_LONG_CASTLE) if self.SideToPlay is Side.WHITE else (BLACK_SHORT_CASTLE, BLACK_LONG_CASTLE)
 
-        # if the king has moved or in check, skip.
-        if king_piece.hasMoved or self.in_check(king_position)[0]:
+        # if the king has lost its castling rights or in check, skip.
+        if not self.castlingRights & (short_right | long_right):
+            return moves
+        attacked = self.attacked_squares(Side.BLACK if self.SideToPlay is Side.WHITE else Side.WHITE)
+        if attacked >> king_position & 1:
             return moves
 
         # Check if no piece in between them, Short castle
-        if squares := self.raycast(king_position, 1, True):
-            if squares[-1].capturedPieceMoved is not None and squares[-1].capturedPieceMoved.pieceType is PieceType.ROOK:
+        if self.castlingRights & short_right and (squares := self.raycast(king_position, 1, True)):
+            if squares[-1].capturedPiecePosition == king_position + 3:
                 short_castle_allowed = True
                 short_rook = squares[-1]
         # Long Castle
-        if squares := self.raycast(king_position, -1, True):
-            if squares[-1].capturedPieceMoved is not None and squares[-1].capturedPieceMoved.pieceType is PieceType.ROOK:
+        if self.castlingRights & long_right and (squares := self.raycast(king_position, -1, True)):
+            if squares[-1].capturedPiecePosition == king_position - 4:
                 long_castle_allowed = True
                 long_rook = squares[-1]
 
         if short_castle_allowed:
-            sq1, sq2 = self.is_attacked(board_indexes=[king_position+1, king_position+2])
-            if not (sq1 or sq2):
+            if not attacked >> (king_position + 1) & 3:
                 a = CastleMove(
                     king_position,
                     short_rook.capturedPiecePosition,
-                    copy(king_piece),
-                    copy(short_rook.capturedPieceMoved),
+                    king_piece,
+                    short_rook.capturedPieceMoved,
                     king_position + 2,
                     king_position + 1,
                 )
                 moves.append(a)
         # long castle
         if long_castle_allowed:
-            sq1, sq2 = self.is_attacked(board_indexes=[king_position-1, king_position-2])
-            if not (sq1 or sq2) and not long_rook.capturedPieceMoved.hasMoved:
+            if not attacked >> (king_position - 2) & 3:
                 a = CastleMove(
                     king_position,
                     long_rook.capturedPiecePosition,
-                    copy(king_piece),
-                    copy(long_rook.capturedPieceMoved),
+                    king_piece,
+                    long_rook.capturedPieceMoved,
                     king_position - 2,
                     king_position - 1,
                 )
@@ -405,198 +828,507 @@ class ChessEngine:
              PieceType.PAWN: self.generate_pawn_moves
         }
         moves = []        
-        for boardIndex, cell in enumerate(self.board):
-            # Check if current cell is empty
-            if cell is None:
+        # Only visits the squares holding the side's pieces
+        for boardIndex in self.pieceSquares[side.value]:
+            cell = self.board[boardIndex]
+            if include_pawn_attacks and cell.pieceType is PieceType.PAWN:
+                moves.extend(self.generate_pawn_moves(boardIndex, include_self_attacks, True))
                 continue
-
-            if cell.side is side :
-                if include_pawn_attacks and cell.pieceType is PieceType.PAWN:
-                    moves.extend(self.generate_pawn_moves(boardIndex, include_self_attacks, True))
-                    continue
-                moves.extend(moveGenerator[cell.pieceType](boardIndex, include_self_attacks))
+            moves.extend(moveGenerator[cell.pieceType](boardIndex, include_self_attacks))
 
         return moves
 
     def in_checkmate(self, king_position: int = None) -> bool:
         if king_position is None:
-            king = self.getPieces(PieceType.KING, self.SideToPlay)[0][1]
+            king = self.kingSquares[self.SideToPlay.value]
         else:
             king = king_position
         return self.is_attacked(board_indexes=[king])[0] and len(self.generate_legal_moves()) == 0
     
     def in_stalemate(self, king_position: int = None) -> bool:
         if king_position is None:
-            king = self.getPieces(PieceType.KING, self.SideToPlay)[0][1]
+            king = self.kingSquares[self.SideToPlay.value]
         else:
             king = king_position
         return not self.is_attacked(board_indexes=[king])[0] and len(self.generate_legal_moves()) == 0
 
-    def process_pins(self, king_position, direction, piece_types, restrictions):
-        piece_list = self.get_xray_piece(king_position, direction)
-        if len(piece_list) < 2:
-            return
-
-        first_index, second_index = piece_list
-
-        first_piece: IPiece = self.board[first_index]
-        second_piece: IPiece = self.board[second_index]
-
-        # checks if the potentially pinned piece is on the same team
-        if first_piece.side is not self.SideToPlay:
-            return
-
-        # checks if the pinning piece is an enemy piece
-        if second_piece.side is self.SideToPlay:
-            return
-
-        if second_piece.pieceType in piece_types:
-            first_piece_allowed_indexes = [
-                *range(first_index, second_index, direction)][1:]
-            first_piece_allowed_indexes.append(second_index)
-            restrictions[first_index] = first_piece_allowed_indexes
-
-
-    def get_attacking_direction(self, first_position, second_position):
-        for direction in self.__VerticalMovement + self.__HorizontalMovement + self.__DiagonalMovement:
-            position_ray = self.raycast(first_position, direction, False, True)
-            if len(position_ray) == 0:
-                continue
-            if second_position == position_ray[-1].capturedPiecePosition:
-                return direction
-        raise IndexError("Attack direction not found")
-
+    # Returns the legal moves of the side to play.
+    # The moves of the last position asked for are kept, as the interface asks for the same position every frame.
     def generate_legal_moves(self) -> list[Move]:
-        moves: list[Move] = self.generate_all_moves(self.SideToPlay)
-        moves.extend(self.castling_moves())
+        if self.__legalMovesKey != self.__hash:
+            if self.bitboards is not None:
+                self.__legalMoves = self.bitboards.generate_legal_moves(self.board, self.SideToPlay, self.castlingRights, self.enPassantSquare)
+            else:
+                self.__legalMoves = self.__generateLegalMoves()
+            self.__legalMovesKey = self.__hash
+        return list(self.__legalMoves)
+
+    # Single pass legal move generation for the list board.
+    # The checkers, the squares which stop a check and the pinned pieces are found once from the king square,
+    # and every generated move is tested against them instead of against the enemy moves.
+    def __generateLegalMoves(self) -> list[Move]:
+        side = self.SideToPlay
+        enemy = Side.WHITE if side is Side.BLACK else Side.BLACK
+        king_position = self.kingSquares[side.value]
+        if king_position is None:
+            return []
+        board = self.board
+        moveGenerator = {
+             PieceType.ROOK: self.generate_rook_moves,
+             PieceType.BISHOP: self.generate_bishop_moves,
+             PieceType.QUEEN: self.generate_queen_moves,
+             PieceType.KNIGHT: self.generate_knight_moves,
+             PieceType.PAWN: self.generate_pawn_moves
+        }
 
-        restrictions = {}
-        validated_moves: list[Move] = []
+        # The enemy king does not block attacks on the king, so it cannot step back along a checking ray
+        attacked = self.attacked_squares(enemy)
+        moves = [move for move in self.generate_king_moves(king_position, False) if not attacked >> move.endPosition & 1]
 
-        kings = self.getPieces(PieceType.KING, self.SideToPlay)
-        if len(kings) == 0:
-            return []
-        king: list[tuple[IPiece, int]] = kings[0]
-
-        king_piece, king_position = king
-
-        enemy_moves: list[Move] = self.generate_all_moves(
-            Side.WHITE if self.SideToPlay is Side.BLACK else Side.BLACK, True, True)
-        king_moves = self.generate_king_moves(king_position, False)
-        for move in king_moves:
-            if not self.is_attacked([move.endPosition], enemy_moves)[0]:
-                validated_moves.append(move)
-        # if in check, can only move king / a piece to block the check or take the attacking piece
-        if (in_check := self.in_check())[0]:
-
-            allowed_positions = []
-            for move in enemy_moves:
-                if move.startPosition == in_check[1][0] :
-                    
-                    if move.pieceMoved.pieceType is PieceType.KNIGHT:
-                        allowed_positions.append(move.startPosition)
-                        banned_king_positions = [move.capturedPiecePosition for move in self.generate_knight_moves(move.startPosition, True)]
-                        break
-                    # gets the attack direction from the attacking piece to the king
-                    attack_direction = self.get_attacking_direction(move.startPosition, king_position)
-                    allowed_positions.append(move.startPosition)
-                    allowed_positions.extend([*range(move.startPosition, king_position, attack_direction)])
-
-                    banned_king_positions = [move.capturedPiecePosition for move in self.raycast(move.startPosition, attack_direction,includeContact=False, xray=True)]
+        checkers = self.attackers(king_position, enemy)
+        # In double check only the king can move
+        if len(checkers) > 1:
+            return moves
+        # Squares a piece has to move to, capturing the checking piece or blocking its ray
+        check_mask = (1 << 64) - 1 if len(checkers) == 0 else 1 << checkers[0]
+
+        # Ray from the king up to and including the pinning piece, for every pinned piece
+        pins: dict[int, int] = {}
+        for directions, sliders in [
+            (ORTHOGONAL_DIRECTIONS, (PieceType.ROOK, PieceType.QUEEN)),
+            (DIAGONAL_DIRECTIONS, (PieceType.BISHOP, PieceType.QUEEN))
+        ]:
+            for direction in directions:
+                ray = 0
+                pinned = None
+                for index in RAYS[direction][king_position]:
+                    ray |= 1 << index
+                    cell = board[index]
+                    if cell is None:
+                        continue
+                    if cell.side is side:
+                        if pinned is not None:
+                            break
+                        pinned = index
+                        continue
+                    if cell.pieceType in sliders:
+                        if pinned is None:
+                            check_mask = ray
+                        else:
+                            pins[pinned] = ray
                     break
-            
-            for move in moves:
-                if move.pieceMoved.pieceType is PieceType.KING:
-                    continue
-                if move.capturedPiecePosition in allowed_positions:
-                    validated_moves.append(move)
-            
-            filtered_moves = []
-            for move in validated_moves:
-                if move.pieceMoved.pieceType is PieceType.KING and move.capturedPiecePosition in banned_king_positions:
-                    continue
-                filtered_moves.append(move)
-            return filtered_moves
 
-        #pins
-        
-        for movement in self.__VerticalMovement + self.__HorizontalMovement:
-            self.process_pins(king_position, movement, [PieceType.QUEEN, PieceType.ROOK, PieceType.KNIGHT], restrictions)
-
-        for movement in self.__DiagonalMovement:
-            self.process_pins(king_position, movement, [PieceType.QUEEN, PieceType.BISHOP, PieceType.KNIGHT], restrictions)
+        if len(checkers) == 0:
+            moves.extend(self.castling_moves())
 
-        
-        for move in moves:
-            if move.pieceMoved.pieceType is PieceType.KING and not isinstance(move, CastleMove):
+        for boardIndex in self.pieceSquares[side.value]:
+            if boardIndex == king_position:
                 continue
-            if move.startPosition not in restrictions:
-                validated_moves.append(move)
-            else:
-                if move.endPosition in restrictions[move.startPosition]:
-                    validated_moves.append(move)
-        
-        return validated_moves
-
-    def minmax_a_b(self, depth, maximising, alpha, beta):
-        if depth == 0 or self.checkmated:
-            return evaluate_board(self.board)
+            cell = board[boardIndex]
+            pieceMoves = moveGenerator[cell.pieceType](boardIndex, False)
+            pin_mask = pins.get(boardIndex, check_mask)
+            allowed = pin_mask & check_mask
+            for move in pieceMoves:
+                if move.capturedPiecePosition != move.endPosition:
+                    # En passant stops a check by taking the checking pawn, and removes two pieces from the rank of the king
+                    if (allowed >> move.endPosition & 1 or (pin_mask >> move.endPosition & 1 and check_mask >> move.capturedPiecePosition & 1)) \
+                            and self.__enPassantLeavesKingSafe(move, king_position, enemy):
+                        moves.append(move)
+                elif allowed >> move.endPosition & 1:
+                    moves.append(move)
+        return moves
 
-        moves = self.generate_legal_moves()
-        for move in moves:
-            if move.capturedPieceMoved is None:
-                continue
-            if move.capturedPieceMoved.pieceType is PieceType.KING:
-                moves.remove(move)
+    # Checks the position after an en passant capture for an attack on the king, on a scratch copy of the board squares.
+    def __enPassantLeavesKingSafe(self, move: Move, king_position: int, enemy: Side) -> bool:
+        board = self.board
+        captured = board[move.capturedPiecePosition]
+        board[move.startPosition] = None
+        board[move.capturedPiecePosition] = None
+        board[move.endPosition] = move.pieceMoved
+        safe = len(self.attackers(king_position, enemy)) == 0
+        board[move.endPosition] = None
+        board[move.capturedPiecePosition] = captured
+        board[move.startPosition] = move.pieceMoved
+        return safe
+
+    # Score of a position without legal moves: checkmate, or a draw by stalemate.
+    # Mates found with more depth remaining are closer to the root, so they score higher.
+    def terminal_score(self, depth: int):
+        if not self.in_check()[0]:
+            return 0
+        return -(MATE_SCORE + depth) if self.SideToPlay is Side.WHITE else MATE_SCORE + depth
+
+    # allow_null: whether null move pruning may be tried at this node, off right after a null move and in verification searches.
+    def minmax_a_b(self, depth, maximising, alpha, beta, allow_null: bool = True):
+        self.__checkLimits()
+        if self.checkmated:
+            return self.evaluate()
+        if self.bitbases is not None and (score := self.__probeBitbases(depth)) is not None:
+            self.stats.bitbase_hits += 1
+            return score
+        if depth == 0:
+            if not self.use_quiescence:
+                self.stats.leaf_evaluations += 1
+                return self.evaluate()
+            self.__quiescenceNodes = 0
+            return self.quiescence(maximising, alpha, beta)
+
+        key = self.zobrist_key
+        alpha_original, beta_original = alpha, beta
+        table_move = None
+        entry = self.transposition_table.probe(key)
+        if entry is not None:
+            _, entry_depth, entry_score, entry_bound, table_move = entry
+            if entry_depth >= depth:
+                entry_score = score_from_table(entry_score, depth)
+                if entry_bound is Bound.EXACT:
+                    return entry_score
+                if entry_bound is Bound.LOWER:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if beta <= alpha:
+                    return entry_score
+
+        moves = [move for move in self.generate_legal_moves()
+                 if move.capturedPieceMoved is None or move.capturedPieceMoved.pieceType is not PieceType.KING]
+        if len(moves) == 0:
+            return self.terminal_score(depth)
+
+        in_check = None
+        if self.use_null_move and allow_null and depth >= NULL_MOVE_MIN_DEPTH:
+            in_check = self.__inCheck()
+            if not in_check and (score := self.__nullMoveCutoff(depth, maximising, alpha, beta)) is not None:
+                self.transposition_table.store(key, depth, score, Bound.LOWER if maximising else Bound.UPPER, None)
+                return score
+
+        ply = self.__MoveHistory.items_count - self.__rootHistory
+        moves = self.move_orderer.order(moves, table_move, ply)
+        reduce_late_moves = self.use_late_move_reductions and depth >= LATE_MOVE_MIN_DEPTH
+        if reduce_late_moves:
+            reduce_late_moves = not (in_check if in_check is not None else self.__inCheck())
+
+        best_move = None
         if maximising:
-            max_eval = -99999
-            for move in moves:
+            best_eval = -INFINITY
+            for index, move in enumerate(moves):
                 self.makeMove(move)
-                evaluation = self.minmax_a_b(depth - 1, not maximising, alpha, beta)
+                if reduce_late_moves and index >= LATE_MOVE_INDEX and self.__isReducible(move):
+                    # A reduced search which cannot beat alpha is trusted, one which does is searched again in full.
+                    self.stats.reduced_searches += 1
+                    evaluation = self.minmax_a_b(depth - 1 - LATE_MOVE_REDUCTION, not maximising, alpha, alpha + SCOUT_WINDOW)
+                    if evaluation > alpha:
+                        self.stats.re_searches += 1
+                        evaluation = self.minmax_a_b(depth - 1, not maximising, alpha, beta)
+                else:
+                    evaluation = self.minmax_a_b(depth - 1, not maximising, alpha, beta)
                 self.unmakeMove()
-                max_eval = max(max_eval, evaluation)
-                alpha = max(max_eval, alpha)
+                if evaluation > best_eval:
+                    best_eval = evaluation
+                    best_move = move
+                alpha = max(best_eval, alpha)
                 if beta <= alpha:
+                    self.move_orderer.record_cutoff(move, depth, ply)
+                    self.stats.record_cutoff(index)
                     break
-            return max_eval
         else:
-            min_eval = 99999
-            for move in moves:
+            best_eval = INFINITY
+            for index, move in enumerate(moves):
                 self.makeMove(move)
-                evaluation = self.minmax_a_b(depth - 1, not maximising, alpha, beta)
+                if reduce_late_moves and index >= LATE_MOVE_INDEX and self.__isReducible(move):
+                    self.stats.reduced_searches += 1
+                    evaluation = self.minmax_a_b(depth - 1 - LATE_MOVE_REDUCTION, not maximising, beta - SCOUT_WINDOW, beta)
+                    if evaluation < beta:
+                        self.stats.re_searches += 1
+                        evaluation = self.minmax_a_b(depth - 1, not maximising, alpha, beta)
+                else:
+                    evaluation = self.minmax_a_b(depth - 1, not maximising, alpha, beta)
                 self.unmakeMove()
-                min_eval = min(min_eval, evaluation)
-                beta = min(min_eval, beta)
-                if alpha <= beta:
+                if evaluation < best_eval:
+                    best_eval = evaluation
+                    best_move = move
+                beta = min(best_eval, beta)
+                if beta <= alpha:
+                    self.move_orderer.record_cutoff(move, depth, ply)
+                    self.stats.record_cutoff(index)
                     break
-            return min_eval
 
-    def search_moves(self, moves, depth) -> Move:
-        maximising = True if self.SideToPlay is Side.WHITE else False
-        current_eval = -99999 if maximising else 99999
-        best_moves = []
-        
-        for move in moves:
-            if move.capturedPieceMoved is None:
-                continue
-            if move.capturedPieceMoved.pieceType is PieceType.KING:
-                moves.remove(move)
-        for move in moves:
+        if best_eval <= alpha_original:
+            bound = Bound.UPPER
+        elif best_eval >= beta_original:
+            bound = Bound.LOWER
+        else:
+            bound = Bound.EXACT
+        self.transposition_table.store(key, depth, score_to_table(best_eval, depth), bound, move_key(best_move))
+        return best_eval
+
+    def __inCheck(self) -> bool:
+        king = self.kingSquares[self.SideToPlay.value]
+        enemy = Side.BLACK if self.SideToPlay is Side.WHITE else Side.WHITE
+        return king is not None and len(self.attackers(king, enemy)) != 0
+
+    # Null move pruning: if the side to play passes and a reduced search still fails high, the node is cut off.
+    # Returns the bound to cut off with, or None to search the node normally.
+    # Sides with only pawns left are not pruned, as zugzwang is common there,
+    # and sides with few pieces only once a reduced search of their real moves also fails high.
+    def __nullMoveCutoff(self, depth: int, maximising: bool, alpha, beta):
+        pieces = [
+            square for square in self.pieceSquares[self.SideToPlay.value]
+            if self.board[square].pieceType is not PieceType.PAWN and self.board[square].pieceType is not PieceType.KING
+        ]
+        if not pieces:
+            return None
+        bound = beta if maximising else alpha
+        # Cutoffs against a mate score would prove nothing.
+        if abs(bound) >= MATE_SCORE:
+            return None
+        window = (beta - SCOUT_WINDOW, beta) if maximising else (alpha, alpha + SCOUT_WINDOW)
+
+        self.makeNullMove()
+        evaluation = self.minmax_a_b(depth - 1 - NULL_MOVE_REDUCTION, not maximising, *window, allow_null=False)
+        self.unmakeMove()
+        if (maximising and evaluation < beta) or (not maximising and evaluation > alpha):
+            return None
+
+        if len(pieces) <= NULL_MOVE_VERIFY_PIECES:
+            self.stats.null_move_verifications += 1
+            evaluation = self.minmax_a_b(depth - NULL_MOVE_REDUCTION, maximising, *window, allow_null=False)
+            if (maximising and evaluation < beta) or (not maximising and evaluation > alpha):
+                return None
+        self.stats.null_move_cutoffs += 1
+        return bound
+
+    # Late move reductions only apply to quiet moves which do not give check. Called with the move made.
+    def __isReducible(self, move: Move) -> bool:
+        if move.capturedPieceMoved is not None or isinstance(move, PromotionMove):
+            return False
+        return not self.__inCheck()
+
+    # Score of the position from the endgame bitbases, or None when they do not cover it.
+    # Draws are exact at any depth. The tables do not know how far a win is from mate,
+    # so wins are only scored at the leaves, and the search above them looks for the mate.
+    # Won positions with the losing king in check are left to the search, so checkmates still score as mate.
+    def __probeBitbases(self, depth: int):
+        if len(self.pieceSquares[0]) + len(self.pieceSquares[1]) > MAX_BITBASE_PIECES:
+            return None
+        score = self.bitbases.probe(self.board, self.pieceSquares, self.SideToPlay)
+        if score and depth > 0:
+            return None
+        if score:
+            loser = Side.BLACK if score > 0 else Side.WHITE
+            if loser is self.SideToPlay and self.attackers(self.kingSquares[loser.value], Side.WHITE if score > 0 else Side.BLACK):
+                return None
+        return score
+
+    # Material a capture or promotion wins, used for delta pruning.
+    def __captureGain(self, move: Move) -> int:
+        gain = piece_worth[move.capturedPieceMoved.pieceType] if move.capturedPieceMoved is not None else 0
+        if isinstance(move, PromotionMove):
+            gain += piece_worth[move.promoted_piece.pieceType] - piece_worth[PieceType.PAWN]
+        return gain
+
+    # Searches captures and promotions only, until the position is quiet, so the leaves are not evaluated mid exchange.
+    # The side to play may stand pat on the static evaluation instead of capturing, unless it is in check.
+    def quiescence(self, maximising, alpha, beta):
+        self.__checkLimits()
+        self.__quiescenceNodes += 1
+        self.stats.quiescence_nodes += 1
+        if self.bitbases is not None and (score := self.__probeBitbases(0)) is not None:
+            self.stats.bitbase_hits += 1
+            return score
+
+        king_position = self.kingSquares[self.SideToPlay.value]
+        enemy = Side.BLACK if self.SideToPlay is Side.WHITE else Side.WHITE
+        in_check = self.quiescence_check_evasions and king_position is not None and len(self.attackers(king_position, enemy)) != 0
+        if in_check:
+            moves = self.generate_legal_moves()
+            if len(moves) == 0:
+                return self.terminal_score(0)
+            best_eval = -INFINITY if maximising else INFINITY
+        else:
+            stand_pat = best_eval = self.evaluate()
+            self.stats.leaf_evaluations += 1
+            if maximising:
+                if stand_pat >= beta:
+                    return stand_pat
+                alpha = max(alpha, stand_pat)
+            else:
+                if stand_pat <= alpha:
+                    return stand_pat
+                beta = min(beta, stand_pat)
+            # Out of budget, settle for the static evaluation.
+            if self.__quiescenceNodes >= self.quiescence_node_limit:
+                return stand_pat
+            moves = [move for move in self.generate_legal_moves()
+                     if move.capturedPieceMoved is not None or isinstance(move, PromotionMove)]
+
+        moves = [move for move in moves
+                 if move.capturedPieceMoved is None or move.capturedPieceMoved.pieceType is not PieceType.KING]
+        for move in self.move_orderer.order(moves):
+            # Delta pruning: skip captures which cannot bring the evaluation back into the window.
+            if not in_check:
+                gain = self.__captureGain(move) + DELTA_MARGIN
+                if (maximising and stand_pat + gain <= alpha) or (not maximising and stand_pat - gain >= beta):
+                    continue
             self.makeMove(move)
-            evaluation = self.minmax_a_b(depth, not maximising, -99999, 99999)
+            evaluation = self.quiescence(not maximising, alpha, beta)
             self.unmakeMove()
-            print(evaluation)
             if maximising:
-                if current_eval < evaluation:
-                    del best_moves[:]
-                    best_moves.append(move)
-                    current_eval = evaluation
+                best_eval = max(best_eval, evaluation)
+                alpha = max(alpha, evaluation)
+            else:
+                best_eval = min(best_eval, evaluation)
+                beta = min(beta, evaluation)
+            if beta <= alpha:
+                break
+        return best_eval
+
+    # Stops the search once the time budget or node limit of search_moves runs out.
+    def __checkLimits(self) -> None:
+        self.nodes += 1
+        if self.__nodeLimit is not None and self.nodes >= self.__nodeLimit:
+            raise SearchAborted()
+        if self.__deadline is not None and time.perf_counter() >= self.__deadline:
+            raise SearchAborted()
+        if self.__stopEvent is not None and self.__stopEvent.is_set():
+            raise SearchAborted()
+
+    # Searches every root move to the given depth. Returns the scores in the order the moves were searched.
+    def __searchRoot(self, moves: list[Move], depth: int, maximising: bool) -> list:
+        current_eval = -INFINITY if maximising else INFINITY
+        scores = []
+        for move in moves:
+            # Only moves which could tie or beat the best so far need an exact score.
+            if maximising:
+                alpha, beta = current_eval - TIE_MARGIN, INFINITY
             else:
-                if current_eval > evaluation:
-                    del best_moves[:]
-                    best_moves.append(move)
-                    current_eval = evaluation
-            if evaluation == current_eval:
-                best_moves.append(move)
-        print(f"Best evaluation: {current_eval}")
-        return random.choice(best_moves)
\ No newline at end of file
+                alpha, beta = -INFINITY, current_eval + TIE_MARGIN
+            self.makeMove(move)
+            evaluation = self.minmax_a_b(depth, not maximising, alpha, beta)
+            self.unmakeMove()
+            scores.append(evaluation)
+            if (maximising and evaluation > current_eval) or (not maximising and evaluation < current_eval):
+                current_eval = evaluation
+        return scores
+
+    # Searches a single root move with the given window, used by the workers of the parallel root search.
+    # deadline is a time.perf_counter() value. Raises SearchAborted once the deadline or node limit is reached.
+    def search_root_move(self, move: Move, depth: int, alpha, beta, deadline: float = None, node_limit: int = None):
+        maximising = self.SideToPlay is Side.WHITE
+        self.nodes = 0
+        self.__deadline = deadline
+        self.__nodeLimit = node_limit
+        root_history = self.__rootHistory = self.__MoveHistory.items_count
+        try:
+            self.makeMove(move)
+            return self.minmax_a_b(depth, not maximising, alpha, beta)
+        finally:
+            while self.__MoveHistory.items_count > root_history:
+                self.unmakeMove()
+            self.__deadline = None
+            self.__nodeLimit = None
+
+    # Stops the worker processes of the parallel root search.
+    def close_workers(self) -> None:
+        if self.__rootPool is not None:
+            self.__rootPool.close()
+            self.__rootPool = None
+
+    """
+    - moves: legal moves of the side to play.
+    - depth: remaining depth searched below each root move. Without a time or node limit the search always reaches it.
+    - time_limit_ms: wall clock budget. The search deepens one ply at a time until it runs out.
+    - node_limit: maximum number of nodes to visit, checked like the time budget.
+    - workers: splits the root moves between this many processes. The parallel search checks the node limit
+      and stop_event between iterations only, and gives the same evaluation and best moves as the serial search.
+    - stop_event: stops the search once set, from another thread, checked like the time budget.
+    Returns a book move when the position is in the opening book,
+    otherwise a move from the deepest completed iteration, the first iteration always completes.
+    """
+    def search_moves(self, moves, depth = None, time_limit_ms: float = None, node_limit: int = None, workers: int = None,
+                     stop_event: threading.Event = None) -> Move:
+        self.stats = SearchStats()
+        if self.profiler is not None:
+            self.profiler.reset()
+        # Known opening positions are played from the book without searching.
+        if self.opening_book is not None:
+            book_move = self.opening_book.choose(self.zobrist_key, moves)
+            if book_move is not None:
+                self.last_evaluation = None
+                self.last_best_moves = [book_move]
+                return book_move
+
+        self.transposition_table.reset_stats()
+        self.nodes = 0
+        self.__deadline = None
+        self.__nodeLimit = None
+        start_time = time.perf_counter()
+        maximising = True if self.SideToPlay is Side.WHITE else False
+        max_depth = depth if depth is not None else MAX_SEARCH_DEPTH
+        self.move_orderer.reset()
+        root_history = self.__rootHistory = self.__MoveHistory.items_count
+
+        moves = self.move_orderer.order([move for move in moves
+                 if move.capturedPieceMoved is None or move.capturedPieceMoved.pieceType is not PieceType.KING])
+        if workers is not None and workers > 1:
+            if self.__rootPool is None or self.__rootPool.workers != workers:
+                from ParallelSearch import RootSearchPool
+                self.close_workers()
+                self.__rootPool = RootSearchPool(workers)
+            self.__rootPool.start_search()
+
+        best_moves = []
+        for current_depth in range(0, max_depth + 1):
+            self.current_depth = current_depth
+            depth_start, depth_nodes = time.perf_counter(), self.nodes
+            if self.__rootPool is not None and workers is not None and workers > 1:
+                scores, nodes = self.__rootPool.search(self, moves, current_depth, self.__deadline)
+                self.nodes += nodes
+                if scores is None:
+                    break
+            else:
+                try:
+                    scores = self.__searchRoot(moves, current_depth, maximising)
+                except SearchAborted:
+                    while self.__MoveHistory.items_count > root_history:
+                        self.unmakeMove()
+                    break
+
+            # The next iteration searches the best moves of this one first.
+            ranked = sorted(zip(scores, range(len(moves))), key=lambda pair: pair[0], reverse=maximising)
+            current_eval = ranked[0][0]
+            best_moves = [moves[i] for score, i in ranked if score == current_eval]
+            moves = [moves[i] for _, i in ranked]
+            self.stats.finish_depth(current_depth, self.nodes - depth_nodes, time.perf_counter() - depth_start, current_eval)
+            log_search(LOG_DEBUG, "depth %s", lambda: self.stats.depths[-1])
+
+            # Limits apply once the first iteration has given a move to fall back on.
+            if time_limit_ms is not None:
+                self.__deadline = start_time + time_limit_ms / 1000
+            self.__nodeLimit = node_limit
+            self.__stopEvent = stop_event
+            if self.__deadline is not None and time.perf_counter() >= self.__deadline:
+                break
+            if stop_event is not None and stop_event.is_set():
+                break
+            if node_limit is not None and self.nodes >= node_limit:
+                break
+            # A forced mate does not get any better by searching deeper.
+            if abs(current_eval) >= MATE_SCORE:
+                break
+
+        self.__deadline = None
+        self.__nodeLimit = None
+        self.__stopEvent = None
+        self.last_evaluation = current_eval
+        self.last_best_moves = best_moves
+        self.stats.finish(self.nodes, self.transposition_table)
+        log_search(LOG_INFO, "search %s", self.search_report)
+        return random.choice(best_moves)
+
+    # Statistics of the last search, with the profiler's timings when profiling is on.
+    def search_report(self) -> dict:
+        report = self.stats.to_dict()
+        if self.profiler is not None:
+            report["profile"] = self.profiler.to_dict()
+        return report
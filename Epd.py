@@ -0,0 +1,56 @@
+"""
+Reads positions from EPD files one line at a time, so files of any size are streamed in constant memory.
+An EPD line holds the first four FEN fields followed by operations, each an opcode with its operands ended by a semicolon:
+    r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - bm Bb5; id "Ruy Lopez";
+"""
+import re
+from typing import Iterable, Iterator
+
+from Engine import ChessEngine
+
+# Quoted operands may hold spaces and semicolons.
+OPERATION_TOKEN_PATTERN = re.compile(r'"[^"]*"|;|[^\s;]+')
+
+
+# Splits an EPD line into a FEN string and its operations, as a dictionary of opcode to operands.
+# The move clocks of the FEN come from the hmvc and fmvn opcodes, or from two numbers after the fields as FEN writes them.
+def parse_epd(line: str) -> tuple[str, dict[str, list[str]]]:
+    fields = line.split(maxsplit=4)
+    if len(fields) < 4:
+        raise ValueError(f"EPD needs at least 4 fields: {line}")
+    rest = fields[4] if len(fields) > 4 else ""
+
+    operations: dict[str, list[str]] = {}
+    opcode = None
+    clocks = []
+    for token in OPERATION_TOKEN_PATTERN.findall(rest):
+        if token == ";":
+            opcode = None
+        elif opcode is None:
+            if not operations and len(clocks) < 2 and token.isdigit():
+                clocks.append(token)
+                continue
+            opcode = token
+            operations[opcode] = []
+        else:
+            operations[opcode].append(token[1:-1] if token.startswith('"') else token)
+
+    if len(clocks) != 2:
+        clocks = [operations.get("hmvc", ["0"])[0], operations.get("fmvn", ["1"])[0]]
+    return " ".join(fields[:4] + clocks), operations
+
+
+# Yields (FEN, operations) for every position of the EPD lines. Blank lines and lines starting with # are skipped.
+def read_epd(lines: Iterable[str]) -> Iterator[tuple[str, dict[str, list[str]]]]:
+    for line in lines:
+        stripped = line.strip()
+        if stripped and not stripped.startswith("#"):
+            yield parse_epd(stripped)
+
+
+# Loads every position of the EPD lines into the engine in turn and yields its operations,
+# so a single engine, and its transposition table, serves the whole file.
+def stream_positions(lines: Iterable[str], engine: ChessEngine) -> Iterator[dict[str, list[str]]]:
+    for fen, operations in read_epd(lines):
+        engine.load_fen(fen)
+        yield operations
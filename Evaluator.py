@@ -75,17 +75,37 @@ piece_tables = {
 }
 
 
+# Piece-square tables per side, black tables flipped once here instead of on every lookup.
+side_piece_tables = {
+    Side.WHITE: {pieceType: table[:] for pieceType, table in piece_tables.items()},
+    Side.BLACK: {pieceType: table[::-1] for pieceType, table in piece_tables.items()}
+}
+
+# Piece-square values are in hundredths of a pawn.
+POSITIONAL_SCALE = 100
+
+
 def generate_piece_location_worth(side: Side, pieceType: PieceType, boardIndex: int):
+    return side_piece_tables[side][pieceType][boardIndex]
+
+# Material and piece-square contribution of a piece, positive for white.
+# ChessEngine adds and removes these as pieces move, so evaluation does not need to scan the board.
+def piece_contribution(piece: IPiece, boardIndex: int) -> tuple[int, int]:
+    sign = 1 if piece.side is Side.WHITE else -1
+    return (sign * piece_worth[piece.pieceType], sign * side_piece_tables[piece.side][piece.pieceType][boardIndex])
 
-    pt = piece_tables[pieceType]
-    if side is Side.BLACK:
-        pt = pt[::-1]
-    return pt[boardIndex]
+def combine_evaluation(material: int, positional: int, use_positional: bool):
+    if not use_positional:
+        return material
+    return material + positional / POSITIONAL_SCALE
 
-def evaluate_board(board: list[IPiece]):
-    total_worth = 0
+# Full evaluation of a board, used when there are no running totals to read from.
+def evaluate_board(board: list[IPiece], use_positional: bool = False):
+    material = positional = 0
     for i, cell in enumerate(board):
         if cell is None:
             continue
-        total_worth += (piece_worth[cell.pieceType]) * (1 if cell.side is Side.WHITE else -1) #+ generate_piece_location_worth(cell.side, cell.pieceType, i)) 
-    return total_worth
+        piece_material, piece_positional = piece_contribution(cell, i)
+        material += piece_material
+        positional += piece_positional
+    return combine_evaluation(material, positional, use_positional)
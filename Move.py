@@ -1,7 +1,35 @@
 from Pieces.BasePiece import IPiece
+from Pieces.Queen import Queen
+from Pieces.Rook import Rook
+from Pieces.Bishop import Bishop
+from Pieces.Knight import Knight
+from Enums.PieceEnum import PieceEnum
 from ChessUtility import indexToRF
 
+"""
+Moves pack into a 16 bit key: start square in bits 0-5, end square in bits 6-11 and flags in bits 12-15.
+The key identifies a move within a position, and is what the transposition table and move ordering store.
+"""
+QUIET = 0
+DOUBLE_PAWN_PUSH = 1
+KING_CASTLE = 2
+QUEEN_CASTLE = 3
+CAPTURE = 4
+EN_PASSANT = 5
+# Promotion flags are PROMOTION + the index of the piece in PROMOTION_PIECES, plus CAPTURE for captures.
+PROMOTION = 8
+PROMOTION_PIECES = [PieceEnum.KNIGHT, PieceEnum.BISHOP, PieceEnum.ROOK, PieceEnum.QUEEN]
+# Pieces a pawn can promote to, queen first so it is the default choice when a move is picked by squares.
+PROMOTION_CLASSES = [Queen, Rook, Bishop, Knight]
+
+
+def decode_move_key(key: int) -> tuple[int, int, int]:
+    return (key & 63, key >> 6 & 63, key >> 12)
+
+
 class Move:
+    # Slots keep the many short lived moves created during move generation small.
+    __slots__ = ("startPosition", "endPosition", "pieceMoved", "capturedPieceMoved", "capturedPiecePosition")
 
     def __init__(self, startPosition: int, endPosition: int, pieceMoved: IPiece, capturedPiece: IPiece, capturedPiecePosition: int = 0) -> None:
         self.startPosition = startPosition
@@ -10,18 +38,53 @@ class Move:
         self.capturedPieceMoved = capturedPiece
         self.capturedPiecePosition = capturedPiecePosition if capturedPiecePosition != 0 else endPosition
 
-        self.startRf = indexToRF(self.startPosition)
-        self.endRf = indexToRF(self.endPosition)
+    # Square names are only needed for display and notation, so they are worked out on request.
+    @property
+    def startRf(self) -> str:
+        return indexToRF(self.startPosition)
+
+    @property
+    def endRf(self) -> str:
+        return indexToRF(self.endPosition)
+
+    @property
+    def flags(self) -> int:
+        if self.capturedPiecePosition != self.endPosition:
+            return EN_PASSANT
+        if self.capturedPieceMoved is not None:
+            return CAPTURE
+        if self.pieceMoved is not None and self.pieceMoved.pieceType is PieceEnum.PAWN and abs(self.endPosition - self.startPosition) == 16:
+            return DOUBLE_PAWN_PUSH
+        return QUIET
+
+    @property
+    def key(self) -> int:
+        return self.startPosition | self.endPosition << 6 | self.flags << 12
 
 class CastleMove(Move):
+    __slots__ = ("rook_piece", "rook_start_position", "rook_end_position")
+
     def __init__(self, king_position: int, rook_position: int, king_piece: IPiece, rook_piece: IPiece, king_end_position, rook_end_position) -> None:
         super().__init__(king_position, king_end_position, king_piece, None)
         self.rook_piece = rook_piece
         self.rook_start_position = rook_position
         self.rook_end_position = rook_end_position
 
+    @property
+    def flags(self) -> int:
+        return KING_CASTLE if self.endPosition > self.startPosition else QUEEN_CASTLE
+
 class PromotionMove(Move):
+    __slots__ = ("initial_pawn", "promoted_piece")
+
     def __init__(self, startPosition: int, endPosition: int, pawn_moved: IPiece, promoted_to: IPiece, piece_captured: IPiece = None) -> None:
         super().__init__(startPosition, endPosition, pawn_moved, piece_captured)
         self.initial_pawn = pawn_moved
-        self.promoted_piece = promoted_to
\ No newline at end of file
+        self.promoted_piece = promoted_to
+
+    @property
+    def flags(self) -> int:
+        flags = PROMOTION + PROMOTION_PIECES.index(self.promoted_piece.pieceType)
+        if self.capturedPieceMoved is not None:
+            flags += CAPTURE
+        return flags
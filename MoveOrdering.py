@@ -0,0 +1,61 @@
+from Move import Move, PromotionMove
+from Evaluator import piece_worth
+
+# Sort key offsets, every group is searched before the next.
+TABLE_MOVE_SCORE = 10_000_000
+CAPTURE_SCORE = 1_000_000
+KILLER_SCORE = 900_000
+KILLERS_PER_PLY = 2
+
+
+def move_key(move: Move) -> int:
+    return move.key
+
+
+class MoveOrderer:
+    """
+    Orders moves for the alpha-beta search: transposition table or previous best move first,
+    captures by most valuable victim / least valuable attacker, then killer moves,
+    then the remaining quiet moves by how often they caused a cutoff (history heuristic).
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    # Forgets the killer moves and history scores of the previous search.
+    def reset(self) -> None:
+        self.killers: list[list[int]] = []
+        self.history = [0] * 4096
+
+    def __killers_at(self, ply: int) -> list[int]:
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        return self.killers[ply]
+
+    def score(self, move: Move, table_move: int, killers: list[int]) -> int:
+        key = move_key(move)
+        if key == table_move:
+            return TABLE_MOVE_SCORE
+        if move.capturedPieceMoved is not None or isinstance(move, PromotionMove):
+            victim = piece_worth[move.capturedPieceMoved.pieceType] if move.capturedPieceMoved is not None else 0
+            if isinstance(move, PromotionMove):
+                victim += piece_worth[move.promoted_piece.pieceType]
+            return CAPTURE_SCORE + 10 * victim - piece_worth[move.pieceMoved.pieceType]
+        if key in killers:
+            return KILLER_SCORE - killers.index(key)
+        return self.history[64 * move.startPosition + move.endPosition]
+
+    def order(self, moves: list[Move], table_move: int = None, ply: int = 0) -> list[Move]:
+        killers = self.__killers_at(ply)
+        return sorted(moves, key=lambda move: self.score(move, table_move, killers), reverse=True)
+
+    # Remembers a quiet move which caused a beta cutoff.
+    def record_cutoff(self, move: Move, depth: int, ply: int) -> None:
+        if move.capturedPieceMoved is not None or isinstance(move, PromotionMove):
+            return
+        key = move_key(move)
+        killers = self.__killers_at(ply)
+        if key not in killers:
+            killers.insert(0, key)
+            del killers[KILLERS_PER_PLY:]
+        self.history[64 * move.startPosition + move.endPosition] += depth * depth
@@ -0,0 +1,108 @@
+"""
+Standard algebraic notation (SAN) for moves, as used by PGN files: e4, Nxf3+, exd6, O-O-O, e8=Q#,
+and the long algebraic notation of the UCI protocol: e2e4, e1g1, e7e8q.
+"""
+from Engine import ChessEngine
+from Enums.PieceEnum import PieceEnum as PieceType
+from Move import Move, CastleMove, PromotionMove
+from ChessUtility import indexToRF, files
+
+SAN_PIECES = {"N": PieceType.KNIGHT, "B": PieceType.BISHOP, "R": PieceType.ROOK, "Q": PieceType.QUEEN, "K": PieceType.KING}
+PIECE_LETTERS = {pieceType: letter for letter, pieceType in SAN_PIECES.items()}
+
+
+# Writes the move, which has to be legal in the position of the engine, in SAN.
+def move_to_san(engine: ChessEngine, move: Move) -> str:
+    if isinstance(move, CastleMove):
+        san = "O-O" if move.endPosition > move.startPosition else "O-O-O"
+    else:
+        pieceType = move.pieceMoved.pieceType
+        capture = move.capturedPieceMoved is not None
+        if pieceType is PieceType.PAWN:
+            san = f"{files[move.startPosition % 8]}x" if capture else ""
+            san += indexToRF(move.endPosition)
+            if isinstance(move, PromotionMove):
+                san += "=" + PIECE_LETTERS[move.promoted_piece.pieceType]
+        else:
+            # Name the start file, rank or square when another piece of the same type can reach the same square.
+            others = [
+                other.startPosition for other in engine.generate_legal_moves()
+                if other.endPosition == move.endPosition and other.startPosition != move.startPosition
+                and other.pieceMoved.pieceType is pieceType
+            ]
+            disambiguation = ""
+            if others:
+                if all(other % 8 != move.startPosition % 8 for other in others):
+                    disambiguation = files[move.startPosition % 8]
+                elif all(other // 8 != move.startPosition // 8 for other in others):
+                    disambiguation = indexToRF(move.startPosition)[1]
+                else:
+                    disambiguation = indexToRF(move.startPosition)
+            san = PIECE_LETTERS[pieceType] + disambiguation + ("x" if capture else "") + indexToRF(move.endPosition)
+
+    engine.makeMove(move)
+    if engine.in_check()[0]:
+        san += "#" if len(engine.generate_legal_moves()) == 0 else "+"
+    engine.unmakeMove()
+    return san
+
+
+# Finds the legal move of the engine's side to play written as san. Raises ValueError if there is none, or more than one.
+def move_from_san(engine: ChessEngine, san: str) -> Move:
+    text = san.rstrip("+#!?")
+    moves = engine.generate_legal_moves()
+
+    if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        long = len(text) == 5
+        matches = [
+            move for move in moves
+            if isinstance(move, CastleMove) and (move.endPosition < move.startPosition) == long
+        ]
+    else:
+        promotion = None
+        if "=" in text:
+            text, letter = text.split("=")
+            promotion = SAN_PIECES[letter.upper()]
+        elif text[-1].upper() in SAN_PIECES and text[0].islower():
+            text, promotion = text[:-1], SAN_PIECES[text[-1].upper()]
+
+        pieceType = SAN_PIECES[text[0]] if text[0] in SAN_PIECES else PieceType.PAWN
+        if pieceType is not PieceType.PAWN:
+            text = text[1:]
+        target = text[-2:]
+        # What is left is the start file and/or rank, and the capture mark.
+        disambiguation = text[:-2].replace("x", "")
+
+        matches = []
+        for move in moves:
+            if isinstance(move, CastleMove) or move.pieceMoved.pieceType is not pieceType:
+                continue
+            if indexToRF(move.endPosition) != target:
+                continue
+            if not indexToRF(move.startPosition).startswith(disambiguation) and not indexToRF(move.startPosition).endswith(disambiguation):
+                continue
+            if (promotion is None) != (not isinstance(move, PromotionMove)):
+                continue
+            if promotion is not None and move.promoted_piece.pieceType is not promotion:
+                continue
+            matches.append(move)
+
+    if len(matches) != 1:
+        raise ValueError(f"{'No' if not matches else 'Ambiguous'} move for {san}")
+    return matches[0]
+
+
+# Writes the move as UCI does: start and end squares, and the piece promoted to.
+def move_to_uci(move: Move) -> str:
+    text = f"{move.startRf}{move.endRf}"
+    if isinstance(move, PromotionMove):
+        text += move.promoted_piece.pieceType.value
+    return text
+
+
+# Finds the legal move of the engine's side to play written in UCI notation. Raises ValueError if there is none.
+def move_from_uci(engine: ChessEngine, text: str) -> Move:
+    for move in engine.generate_legal_moves():
+        if move_to_uci(move) == text:
+            return move
+    raise ValueError(f"No move for {text}")
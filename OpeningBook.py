@@ -0,0 +1,118 @@
+"""
+Opening book: a binary file of (zobrist key, move key, weight) entries, sorted by zobrist key.
+The file is memory mapped and binary searched in place, so a lookup only reads the pages it touches.
+Build a book from PGN files with: python OpeningBook.py games.pgn [more.pgn ...] --output book.bin [--plies N]
+"""
+import argparse
+import mmap
+import random
+import struct
+from typing import Iterable
+
+from Move import Move
+from Pgn import read_games, replay_game, replay_engine
+
+# Big endian zobrist key, move key and weight, 12 bytes per entry.
+ENTRY = struct.Struct(">QHH")
+MAX_WEIGHT = 0xFFFF
+# Moves of each game added to the book by default.
+DEFAULT_BOOK_PLIES = 20
+
+
+class OpeningBook:
+    """
+    Read only view of a book file. Weights are how often a move was played in the games the book was built from.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.__file = open(path, "rb")
+        size = self.__file.seek(0, 2)
+        if size % ENTRY.size != 0:
+            self.__file.close()
+            raise ValueError(f"{path} is not an opening book, its size is not a multiple of {ENTRY.size} bytes")
+        # Empty files cannot be mapped.
+        self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.count = size // ENTRY.size
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __entry(self, index: int) -> tuple[int, int, int]:
+        return ENTRY.unpack_from(self.__map, index * ENTRY.size)
+
+    # Returns the (move key, weight) pairs stored for the zobrist key.
+    def entries(self, key: int) -> list[tuple[int, int]]:
+        # Finds the first entry with a key not below the searched one.
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.__entry(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        found = []
+        while low < self.count:
+            entry_key, move, weight = self.__entry(low)
+            if entry_key != key:
+                break
+            found.append((move, weight))
+            low += 1
+        return found
+
+    # Picks one of the legal moves stored for the position, at random in proportion to the weights, or None if out of book.
+    def choose(self, key: int, moves: list[Move]) -> Move:
+        legal = {move.key: move for move in moves}
+        candidates = [(legal[move], weight) for move, weight in self.entries(key) if move in legal and weight > 0]
+        if not candidates:
+            return None
+        return random.choices([move for move, _ in candidates], weights=[weight for _, weight in candidates])[0]
+
+    def close(self) -> None:
+        if self.__map is not None:
+            self.__map.close()
+        self.__file.close()
+
+
+# Counts how often each move was played from each position, over the first plies of every (tags, SAN moves) game.
+# Games start from their FEN tag if they have one. Games stop counting at the first move which cannot be read,
+# and games with an invalid FEN tag are skipped.
+def count_book_moves(games: Iterable[tuple[dict, list[str]]], plies: int = DEFAULT_BOOK_PLIES) -> dict[tuple[int, int], int]:
+    counts: dict[tuple[int, int], int] = {}
+    engine = replay_engine()
+    for tags, sans in games:
+        try:
+            for position, move in replay_game(engine, tags, sans[:plies]):
+                entry = (position.zobrist_key, move.key)
+                counts[entry] = counts.get(entry, 0) + 1
+        except ValueError:
+            continue
+    return counts
+
+
+def write_book(counts: dict[tuple[int, int], int], path: str) -> int:
+    entries = sorted(counts.items(), key=lambda item: (item[0][0], -item[1]))
+    with open(path, "wb") as file:
+        for (key, move), count in entries:
+            file.write(ENTRY.pack(key, move, min(count, MAX_WEIGHT)))
+    return len(entries)
+
+
+def build_book(pgn_paths: list[str], output: str, plies: int = DEFAULT_BOOK_PLIES) -> int:
+    def games():
+        for pgn_path in pgn_paths:
+            with open(pgn_path, encoding="utf-8", errors="replace") as file:
+                for tags, sans, _ in read_games(file):
+                    yield tags, sans
+    return write_book(count_book_moves(games(), plies), output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build an opening book from PGN files.")
+    parser.add_argument("pgn", nargs="+", help="PGN files to read")
+    parser.add_argument("--output", default="book.bin", help="book file to write")
+    parser.add_argument("--plies", type=int, default=DEFAULT_BOOK_PLIES, help="moves of each game to add to the book")
+    args = parser.parse_args()
+
+    entries = build_book(args.pgn, args.output, args.plies)
+    print(f"Wrote {entries} entries to {args.output}")
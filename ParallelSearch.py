@@ -0,0 +1,194 @@
+"""
+Root parallel search: the root moves of each iteration are split between worker processes.
+Every worker keeps its own engine and transposition table, and rebuilds the position from a compact serialized form.
+The best root score found so far is shared between the workers, so each root move is searched with a window
+at least as wide as the serial search would use, and the moves tied for best get exact scores.
+Run with: python ParallelSearch.py [--workers N] [--depth N] [--fen FEN]
+Prints the time taken with 1 to N workers as JSON.
+"""
+import argparse
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Engine import ChessEngine, SearchAborted, INFINITY, TIE_MARGIN
+from Enums.SideEnum import SideEnum as Side
+from Enums.PieceEnum import PieceEnum as PieceType
+from Move import Move
+from Pieces.BasePiece import IPiece
+from Pieces.Pawn import Pawn
+from Pieces.Knight import Knight
+from Pieces.Bishop import Bishop
+from Pieces.Rook import Rook
+from Pieces.Queen import Queen
+from Pieces.King import King
+from BatchEvaluator import encode_board, CODE_OFFSET, PIECE_CODES
+
+PIECE_CLASSES = {
+    PieceType.PAWN: Pawn, PieceType.KNIGHT: Knight, PieceType.BISHOP: Bishop,
+    PieceType.ROOK: Rook, PieceType.QUEEN: Queen, PieceType.KING: King
+}
+CODE_PIECES = {code: pieceType for pieceType, code in PIECE_CODES.items()}
+
+
+# Packs the board and state into (64 bytes of piece codes, side to play, castling rights, en passant square).
+def serialize_position(engine: ChessEngine) -> tuple:
+    board = bytes(code + CODE_OFFSET for code in encode_board(engine.board))
+    return (board, engine.SideToPlay.value, engine.castlingRights, engine.enPassantSquare)
+
+
+def deserialize_board(data: bytes) -> list[IPiece]:
+    board: list[IPiece] = []
+    for value in data:
+        code = value - CODE_OFFSET
+        if code == 0:
+            board.append(None)
+            continue
+        board.append(PIECE_CLASSES[CODE_PIECES[abs(code)]](Side.WHITE if code > 0 else Side.BLACK))
+    return board
+
+
+# Engine settings a worker needs to search the same way as the engine it works for.
+def engine_options(engine: ChessEngine) -> tuple:
+    return (
+        engine.bitboards is not None, engine.transposition_table.size_mb, engine.use_positional,
+        engine.use_quiescence, engine.quiescence_node_limit, engine.quiescence_check_evasions, engine.bitbase_directory,
+        engine.use_null_move, engine.use_late_move_reductions
+    )
+
+
+# State of a worker process.
+_shared_best = None
+_engine: ChessEngine = None
+_engine_options: tuple = None
+_search_id: int = None
+
+
+def _init_worker(shared_best) -> None:
+    global _shared_best
+    _shared_best = shared_best
+
+
+def _worker_engine(options: tuple, search_id: int) -> ChessEngine:
+    global _engine, _engine_options, _search_id
+    if _engine is None or options != _engine_options:
+        (use_bitboards, tt_size_mb, use_positional, use_quiescence, quiescence_node_limit, quiescence_check_evasions, bitbase_directory,
+         use_null_move, use_late_move_reductions) = options
+        _engine = ChessEngine(
+            use_bitboards=use_bitboards, tt_size_mb=tt_size_mb, use_positional=use_positional, use_quiescence=use_quiescence,
+            quiescence_node_limit=quiescence_node_limit, quiescence_check_evasions=quiescence_check_evasions,
+            bitbase_directory=bitbase_directory, use_null_move=use_null_move, use_late_move_reductions=use_late_move_reductions
+        )
+        _engine_options = options
+    # Killer moves and history belong to one search, the transposition table is kept between searches.
+    if search_id != _search_id:
+        _engine.move_orderer.reset()
+        _search_id = search_id
+    return _engine
+
+
+# Searches one root move. Returns (score, nodes), with a score of None if the time budget ran out.
+# wall_deadline is a time.time() value, as perf_counter values are not comparable between processes.
+def _search_move(options: tuple, search_id: int, position: tuple, key: int, depth: int, wall_deadline: float):
+    engine = _worker_engine(options, search_id)
+    board, side, castling_rights, en_passant_square = position
+    engine.load_position(deserialize_board(board), Side(side), castling_rights, en_passant_square)
+    move = next(move for move in engine.generate_legal_moves() if move.key == key)
+    maximising = engine.SideToPlay is Side.WHITE
+
+    # Only moves which could tie or beat the best score of the other workers need an exact score.
+    best = _shared_best.value
+    if maximising:
+        alpha, beta = best - TIE_MARGIN, INFINITY
+    else:
+        alpha, beta = -INFINITY, best + TIE_MARGIN
+    deadline = time.perf_counter() + wall_deadline - time.time() if wall_deadline is not None else None
+    try:
+        score = engine.search_root_move(move, depth, alpha, beta, deadline)
+    except SearchAborted:
+        return None, engine.nodes
+
+    with _shared_best.get_lock():
+        if (maximising and score > _shared_best.value) or (not maximising and score < _shared_best.value):
+            _shared_best.value = score
+    return score, engine.nodes
+
+
+class RootSearchPool:
+    """
+    Worker processes searching the root moves of ChessEngine.search_moves in parallel.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self.shared_best = multiprocessing.Value("d", 0.0)
+        self.executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(self.shared_best,))
+        self.search_id = 0
+
+    def start_search(self) -> None:
+        self.search_id += 1
+
+    # Searches every root move to the given depth. deadline is a time.perf_counter() value or None.
+    # Returns the scores in the order of the moves, or None if the time budget ran out, and the nodes visited.
+    def search(self, engine: ChessEngine, moves: list[Move], depth: int, deadline: float = None) -> tuple[list, int]:
+        maximising = engine.SideToPlay is Side.WHITE
+        self.shared_best.value = -INFINITY if maximising else INFINITY
+        options = engine_options(engine)
+        position = serialize_position(engine)
+        wall_deadline = time.time() + deadline - time.perf_counter() if deadline is not None else None
+        futures = [
+            self.executor.submit(_search_move, options, self.search_id, position, move.key, depth, wall_deadline)
+            for move in moves
+        ]
+        scores = []
+        nodes = 0
+        for future in futures:
+            if future.cancelled():
+                continue
+            score, move_nodes = future.result()
+            nodes += move_nodes
+            scores.append(score)
+            # Out of time, the moves not started yet are not needed.
+            if score is None:
+                for pending in futures:
+                    pending.cancel()
+        if len(scores) < len(moves) or None in scores:
+            return None, nodes
+        return scores, nodes
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+
+def benchmark(fen: str, depth: int, max_workers: int) -> dict:
+    results = []
+    serial = None
+    for workers in range(1, max_workers + 1):
+        engine = ChessEngine.from_fen(fen)
+        start = time.perf_counter()
+        engine.search_moves(engine.generate_legal_moves(), depth, workers=workers)
+        seconds = time.perf_counter() - start
+        engine.close_workers()
+        best_moves = sorted(move.key for move in engine.last_best_moves)
+        if serial is None:
+            serial = (engine.last_evaluation, best_moves, seconds)
+        results.append({
+            "workers": workers,
+            "seconds": round(seconds, 4),
+            "speedup": round(serial[2] / seconds, 2) if seconds > 0 else None,
+            "nodes": engine.nodes,
+            "evaluation": engine.last_evaluation,
+            "matches_serial": (engine.last_evaluation, best_moves) == serial[:2],
+        })
+    return {"fen": fen, "depth": depth, "cpus": multiprocessing.cpu_count(), "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the root parallel search with 1 to N workers and print the results as JSON.")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="largest number of workers to try")
+    parser.add_argument("--depth", type=int, default=2, help="search depth")
+    parser.add_argument("--fen", default="r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4", help="position to search")
+    args = parser.parse_args()
+
+    print(json.dumps(benchmark(args.fen, args.depth, args.workers), indent=2))
@@ -0,0 +1,136 @@
+"""
+Perft: counts the leaf nodes of the legal move tree to a fixed depth.
+Used to check move generation against known counts and to measure its speed.
+Headless, run with: python Perft.py [--depth N] [--position NAME] [--bitboards] [--divide]
+Prints the results as JSON.
+"""
+import argparse
+import json
+import time
+
+from Engine import ChessEngine
+from Notation import move_to_uci
+
+# Standard perft positions with their published node counts, indexed by depth - 1.
+# depth is the default depth, chosen to keep a full run of the suite short.
+SUITE = [
+    {
+        "name": "start",
+        "fen": "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+        "expected": [20, 400, 8902, 197281, 4865609],
+        "depth": 3,
+    },
+    {
+        "name": "kiwipete",
+        "fen": "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        "expected": [48, 2039, 97862, 4085603],
+        "depth": 2,
+    },
+    {
+        # En passant captures which would expose the king along the rank.
+        "name": "en-passant",
+        "fen": "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        "expected": [14, 191, 2812, 43238, 674624],
+        "depth": 3,
+    },
+    {
+        # Promotions, including under-promotions and promotions with capture.
+        "name": "promotion",
+        "fen": "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        "expected": [6, 264, 9467, 422333],
+        "depth": 2,
+    },
+    {
+        "name": "promotion-check",
+        "fen": "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        "expected": [44, 1486, 62379, 2103487],
+        "depth": 2,
+    },
+]
+
+def perft(engine: ChessEngine, depth: int) -> int:
+    if depth == 0:
+        return 1
+    moves = engine.generate_legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        engine.makeMove(move)
+        nodes += perft(engine, depth - 1)
+        engine.unmakeMove()
+    return nodes
+
+
+# Node counts below each root move.
+def divide(engine: ChessEngine, depth: int) -> dict[str, int]:
+    counts = {}
+    for move in engine.generate_legal_moves():
+        engine.makeMove(move)
+        counts[move_to_uci(move)] = perft(engine, depth - 1)
+        engine.unmakeMove()
+    return counts
+
+
+def run_position(position: dict, depth: int = None, use_bitboards: bool = False, include_divide: bool = False) -> dict:
+    depth = depth if depth is not None else position["depth"]
+    engine = ChessEngine.from_fen(position["fen"], use_bitboards=use_bitboards)
+    start = time.perf_counter()
+    if include_divide:
+        breakdown = divide(engine, depth)
+        nodes = sum(breakdown.values())
+    else:
+        nodes = perft(engine, depth)
+    seconds = time.perf_counter() - start
+
+    expected = position["expected"][depth - 1] if depth <= len(position["expected"]) else None
+    result = {
+        "name": position["name"],
+        "fen": position["fen"],
+        "depth": depth,
+        "nodes": nodes,
+        "expected": expected,
+        "passed": None if expected is None else nodes == expected,
+        "seconds": round(seconds, 4),
+        "nps": round(nodes / seconds) if seconds > 0 else None,
+    }
+    if include_divide:
+        result["divide"] = breakdown
+    return result
+
+
+def run_suite(depth: int = None, names: list[str] = None, use_bitboards: bool = False, include_divide: bool = False) -> dict:
+    results = [
+        run_position(position, depth, use_bitboards, include_divide)
+        for position in SUITE
+        if names is None or position["name"] in names
+    ]
+    nodes = sum(result["nodes"] for result in results)
+    seconds = sum(result["seconds"] for result in results)
+    return {
+        "backend": "bitboard" if use_bitboards else "list",
+        "positions": results,
+        "nodes": nodes,
+        "seconds": round(seconds, 4),
+        "nps": round(nodes / seconds) if seconds > 0 else None,
+        "passed": all(result["passed"] is not False for result in results),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the perft suite and print the results as JSON.")
+    parser.add_argument("--depth", type=int, help="depth for every position, defaults to each position's own depth")
+    parser.add_argument("--position", action="append", help="name of a suite position to run, can be repeated")
+    parser.add_argument("--fen", help="run a single position given as FEN instead of the suite")
+    parser.add_argument("--bitboards", action="store_true", help="use the bitboard backend")
+    parser.add_argument("--divide", action="store_true", help="include node counts per root move")
+    args = parser.parse_args()
+
+    if args.fen:
+        position = {"name": "fen", "fen": args.fen, "expected": [], "depth": args.depth or 1}
+        output = run_position(position, args.depth, args.bitboards, args.divide)
+    else:
+        output = run_suite(args.depth, args.position, args.bitboards, args.divide)
+    print(json.dumps(output, indent=2))
+    if output["passed"] is False:
+        raise SystemExit(1)
@@ -0,0 +1,173 @@
+"""
+Reads games from PGN text one game at a time, so files of any size can be read without loading them whole,
+and replays them through the engine as (position, move) pairs, optionally sharding the games over worker processes.
+Run with: python Pgn.py games.pgn [more.pgn ...] [--workers N]
+Prints the games and positions replayed, and games per second, as JSON.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
+
+from Engine import ChessEngine, START_FEN
+from Move import Move
+from Notation import move_from_san
+
+RESULTS = {"1-0", "0-1", "1/2-1/2", "*"}
+TAG_PATTERN = re.compile(r'\[(\w+)\s+"(.*)"\]')
+# Comments, variations and numeric annotation glyphs are skipped, move numbers are dropped.
+COMMENT_PATTERN = re.compile(r"\{[^}]*\}|;[^\n]*")
+MOVE_NUMBER_PATTERN = re.compile(r"^\d+\.+")
+
+
+def _remove_variations(movetext: str) -> str:
+    kept = []
+    depth = 0
+    for character in movetext:
+        if character == "(":
+            depth += 1
+        elif character == ")":
+            depth = max(0, depth - 1)
+        elif depth == 0:
+            kept.append(character)
+    return "".join(kept)
+
+
+# Splits the movetext of a game into its SAN moves and result.
+def parse_movetext(movetext: str) -> tuple[list[str], str]:
+    movetext = _remove_variations(COMMENT_PATTERN.sub(" ", movetext))
+    moves = []
+    result = "*"
+    for token in movetext.split():
+        token = MOVE_NUMBER_PATTERN.sub("", token)
+        if not token or token.startswith("$"):
+            continue
+        if token in RESULTS:
+            result = token
+            continue
+        moves.append(token)
+    return moves, result
+
+
+# Yields (tags, SAN moves, result) for every game of the PGN lines.
+def read_games(lines: Iterable[str]) -> Iterator[tuple[dict, list[str], str]]:
+    tags = {}
+    movetext = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("[") and (match := TAG_PATTERN.match(stripped)):
+            # A tag after movetext starts the next game.
+            if movetext:
+                yield (tags, *parse_movetext(" ".join(movetext)))
+                tags, movetext = {}, []
+            tags[match.group(1)] = match.group(2)
+        elif stripped:
+            movetext.append(stripped)
+    if movetext:
+        yield (tags, *parse_movetext(" ".join(movetext)))
+
+
+# Games sent to a worker process at a time.
+REPLAY_BATCH_SIZE = 64
+
+
+# An engine for replaying games: it never searches, so it gets a small transposition table and no bitbases.
+def replay_engine() -> ChessEngine:
+    return ChessEngine(tt_size_mb=0.1, bitbase_directory=None)
+
+
+# Replays the SAN moves of a game, starting from its FEN tag if it has one, and yields (engine, move) for every move.
+# The engine holds the position before the move while the caller looks at it, and the move is made once it resumes.
+# The game stops at the first move which cannot be read.
+def replay_game(engine: ChessEngine, tags: dict, sans: list[str]) -> Iterator[tuple[ChessEngine, Move]]:
+    engine.load_fen(tags.get("FEN", START_FEN))
+    for san in sans:
+        try:
+            move = move_from_san(engine, san)
+        except (ValueError, KeyError, IndexError):
+            return
+        yield engine, move
+        engine.makeMove(move)
+
+
+# Yields (FEN, move) for every move of every game of the PGN lines, replayed on a single engine.
+def read_positions(lines: Iterable[str], engine: ChessEngine = None) -> Iterator[tuple[str, Move]]:
+    engine = engine if engine is not None else replay_engine()
+    for tags, sans, _ in read_games(lines):
+        for position, move in replay_game(engine, tags, sans):
+            yield position.to_fen(), move
+
+
+# Engine of a worker process, created by the first batch it replays.
+_engine: ChessEngine = None
+
+
+def _replay_batch(games: list[tuple[dict, list[str]]]) -> list[list[tuple[str, Move]]]:
+    global _engine
+    if _engine is None:
+        _engine = replay_engine()
+    return [
+        [(position.to_fen(), move) for position, move in replay_game(_engine, tags, sans)]
+        for tags, sans in games
+    ]
+
+
+# Yields (FEN, move) like read_positions, with batches of games replayed by worker processes.
+# Games keep their order, and only a few batches per worker are in flight, so memory stays bounded.
+def read_positions_parallel(lines: Iterable[str], workers: int = None) -> Iterator[tuple[str, Move]]:
+    workers = workers or multiprocessing.cpu_count()
+    games = ((tags, sans) for tags, sans, _ in read_games(lines))
+    with ProcessPoolExecutor(workers) as executor:
+        pending = deque()
+        while True:
+            while len(pending) < 2 * workers and (batch := list(itertools.islice(games, REPLAY_BATCH_SIZE))):
+                pending.append(executor.submit(_replay_batch, batch))
+            if not pending:
+                return
+            for positions in pending.popleft().result():
+                yield from positions
+
+
+def _read_files(paths: list[str]) -> Iterator[str]:
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as file:
+            yield from file
+
+
+# Replays every game of the PGN files and measures the throughput.
+def benchmark(paths: list[str], workers: int = 1) -> dict:
+    games = 0
+    positions = 0
+    start = time.perf_counter()
+    if workers > 1:
+        replayed = read_positions_parallel(_read_files(paths), workers)
+    else:
+        replayed = read_positions(_read_files(paths))
+    for _ in replayed:
+        positions += 1
+    seconds = time.perf_counter() - start
+    # Counting the games only parses them, which is quick next to replaying them.
+    for _ in read_games(_read_files(paths)):
+        games += 1
+    return {
+        "games": games,
+        "positions": positions,
+        "workers": workers,
+        "seconds": round(seconds, 4),
+        "games_per_second": round(games / seconds, 1) if seconds > 0 else None,
+        "positions_per_second": round(positions / seconds) if seconds > 0 else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay PGN files through the engine and print the throughput as JSON.")
+    parser.add_argument("pgn", nargs="+", help="PGN files to read")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes replaying the games")
+    args = parser.parse_args()
+
+    print(json.dumps(benchmark(args.pgn, args.workers), indent=2))
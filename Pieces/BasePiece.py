@@ -3,11 +3,37 @@ from Enums.PieceEnum import PieceEnum
 
 
 class IPiece:
+    """
+    Pieces are immutable flyweights: there is one shared instance per piece class and side,
+    so constructing Queen(SideEnum.WHITE) twice returns the same object.
+    Whether a piece has moved is position state kept by ChessEngine (castling rights, en passant square).
+    """
+    __slots__ = ("side", "pieceType")
+    __instances: dict = {}
+
+    def __new__(cls, side: SideEnum, *args):
+        instance = IPiece.__instances.get((cls, side))
+        if instance is None:
+            instance = super().__new__(cls)
+            IPiece.__instances[(cls, side)] = instance
+        return instance
 
     def __init__(self, side: SideEnum, piece: PieceEnum) -> None:
-        self.side = side
-        self.pieceType: PieceEnum = piece
-        self.hasMoved: bool = False
+        object.__setattr__(self, "side", side)
+        object.__setattr__(self, "pieceType", piece)
+
+    def __setattr__(self, name, value) -> None:
+        raise AttributeError(f"{type(self).__name__} pieces are immutable")
+
+    # Shared instances are returned as they are, so copies of a piece stay the flyweight.
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (type(self), (self.side,))
 
     def __str__(self) -> str:
         return f'{self.side.name[0].lower()}{self.pieceType.name[0]}'
@@ -4,5 +4,7 @@ from Enums.PieceEnum import PieceEnum
 
 
 class Bishop(IPiece):
+    __slots__ = ()
+
     def __init__(self, side: SideEnum):
         super().__init__(side, PieceEnum.BISHOP)
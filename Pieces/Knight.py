@@ -4,6 +4,8 @@ from Enums.PieceEnum import PieceEnum
 
 
 class Knight(IPiece):
+    __slots__ = ()
+
     def __init__(self, side: SideEnum) -> None:
         super().__init__(side, PieceEnum.KNIGHT)
 
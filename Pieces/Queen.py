@@ -4,5 +4,7 @@ from Enums.PieceEnum import PieceEnum
 
 
 class Queen(IPiece):
+    __slots__ = ()
+
     def __init__(self, side: SideEnum) -> None:
         super().__init__(side, PieceEnum.QUEEN)
@@ -0,0 +1,72 @@
+"""
+Search benchmark: searches a fixed set of positions to a fixed depth with null move pruning and late move reductions
+switched on and off, and compares the nodes and time each setting needs.
+Run with: python SearchBench.py [--depth N] [--fen FEN ...]
+Prints the results as JSON.
+"""
+import argparse
+import json
+import random
+import time
+
+from Engine import ChessEngine
+from Perft import SUITE
+
+# Middlegame and endgame positions added to the perft suite, so zugzwang prone endings are covered.
+POSITIONS = [position["fen"] for position in SUITE] + [
+    "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+    "r2q1rk1/pp2bppp/2n1pn2/3p4/3P4/2NBPN2/PP3PPP/R2Q1RK1 w - - 0 10",
+    "8/8/4k3/8/2p5/2P1K3/8/8 w - - 0 1",
+    "8/5k2/8/3R4/8/2K5/8/3r4 b - - 0 1",
+]
+# Settings compared, the first is the baseline the others are measured against.
+SETTINGS = {
+    "full width": {"use_null_move": False, "use_late_move_reductions": False},
+    "null move": {"use_null_move": True, "use_late_move_reductions": False},
+    "late move reductions": {"use_null_move": False, "use_late_move_reductions": True},
+    "both": {"use_null_move": True, "use_late_move_reductions": True},
+}
+
+
+def run_setting(options: dict, fens: list[str], depth: int) -> dict:
+    results = []
+    for fen in fens:
+        # Ties between root moves are broken at random, the seed keeps the runs comparable.
+        random.seed(0)
+        engine = ChessEngine.from_fen(fen, bitbase_directory=None, **options)
+        start = time.perf_counter()
+        engine.search_moves(engine.generate_legal_moves(), depth)
+        seconds = time.perf_counter() - start
+        results.append({
+            "fen": fen,
+            "nodes": engine.nodes,
+            "seconds": round(seconds, 4),
+            "evaluation": engine.last_evaluation,
+            "null_move_cutoffs": engine.stats.null_move_cutoffs,
+            "re_searches": engine.stats.re_searches,
+        })
+    nodes = sum(result["nodes"] for result in results)
+    seconds = sum(result["seconds"] for result in results)
+    return {"options": options, "nodes": nodes, "seconds": round(seconds, 4), "positions": results}
+
+
+def run_benchmark(depth: int, fens: list[str] = None) -> dict:
+    fens = fens or POSITIONS
+    settings = {name: run_setting(options, fens, depth) for name, options in SETTINGS.items()}
+    baseline = next(iter(settings.values()))
+    for result in settings.values():
+        result["node_ratio"] = round(result["nodes"] / baseline["nodes"], 4) if baseline["nodes"] else None
+        result["evaluations_changed"] = sum(
+            position["evaluation"] != base["evaluation"]
+            for position, base in zip(result["positions"], baseline["positions"])
+        )
+    return {"depth": depth, "settings": settings}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the nodes searched with and without selective search, as JSON.")
+    parser.add_argument("--depth", type=int, default=3, help="search depth")
+    parser.add_argument("--fen", action="append", help="position to search instead of the built in set, can be repeated")
+    args = parser.parse_args()
+
+    print(json.dumps(run_benchmark(args.depth, args.fen), indent=2))
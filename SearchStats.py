@@ -0,0 +1,135 @@
+import time
+from functools import wraps
+
+# Engine methods the profiler can time, the ones move generation and search spend their time in.
+PROFILED_METHODS = ("raycast", "is_attacked", "attackers", "generate_legal_moves", "makeMove", "unmakeMove", "evaluate")
+
+
+class SearchStats:
+    """
+    Counters of one ChessEngine.search_moves call, kept up to date while it searches.
+    Cutoffs are counted by the index of the move causing them in the ordered move list,
+    so a good move ordering shows most of them at index 0.
+    The parallel root search only adds up the nodes of its workers, the other counters stay with the workers.
+    """
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.seconds = 0.0
+        self.nodes = 0
+        self.quiescence_nodes = 0
+        self.leaf_evaluations = 0
+        self.bitbase_hits = 0
+        self.cutoffs: dict[int, int] = {}
+        # Selective search: null move cutoffs and their verification searches,
+        # late moves searched with a reduced depth, and the ones searched again in full.
+        self.null_move_cutoffs = 0
+        self.null_move_verifications = 0
+        self.reduced_searches = 0
+        self.re_searches = 0
+        # One record per finished iteration: depth, nodes, seconds and evaluation.
+        self.depths: list[dict] = []
+        self.transposition_hits = 0
+        self.transposition_misses = 0
+
+    def record_cutoff(self, index: int) -> None:
+        self.cutoffs[index] = self.cutoffs.get(index, 0) + 1
+
+    def finish_depth(self, depth: int, nodes: int, seconds: float, evaluation) -> None:
+        self.depths.append({"depth": depth, "nodes": nodes, "seconds": round(seconds, 6), "evaluation": evaluation})
+
+    def finish(self, nodes: int, transposition_table) -> None:
+        self.seconds = time.perf_counter() - self.start
+        self.nodes = nodes
+        self.transposition_hits = transposition_table.hits
+        self.transposition_misses = transposition_table.misses
+
+    # Nodes per second over the whole search.
+    @property
+    def nps(self) -> int:
+        return round(self.nodes / self.seconds) if self.seconds > 0 else None
+
+    # How many times more nodes the last finished iteration took than the one before it.
+    @property
+    def effective_branching_factor(self) -> float:
+        if len(self.depths) < 2 or self.depths[-2]["nodes"] == 0:
+            return None
+        return round(self.depths[-1]["nodes"] / self.depths[-2]["nodes"], 3)
+
+    # Share of the cutoffs caused by the first move searched.
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        total = sum(self.cutoffs.values())
+        return round(self.cutoffs.get(0, 0) / total, 4) if total else None
+
+    def to_dict(self) -> dict:
+        return {
+            "nodes": self.nodes,
+            "quiescence_nodes": self.quiescence_nodes,
+            "leaf_evaluations": self.leaf_evaluations,
+            "bitbase_hits": self.bitbase_hits,
+            "cutoffs": dict(sorted(self.cutoffs.items())),
+            "first_move_cutoff_rate": self.first_move_cutoff_rate,
+            "null_move_cutoffs": self.null_move_cutoffs,
+            "null_move_verifications": self.null_move_verifications,
+            "reduced_searches": self.reduced_searches,
+            "re_searches": self.re_searches,
+            "effective_branching_factor": self.effective_branching_factor,
+            "depths": self.depths,
+            "transposition_hits": self.transposition_hits,
+            "transposition_misses": self.transposition_misses,
+            "seconds": round(self.seconds, 6),
+            "nps": self.nps,
+        }
+
+
+class Profiler:
+    """
+    Call counts and time spent in the PROFILED_METHODS of an engine.
+    Installing it shadows those methods with timed wrappers on the engine instance,
+    uninstalling removes the wrappers again, so an engine which is not profiled runs its methods untouched.
+    Time spent in a method includes the profiled methods it calls.
+    """
+
+    def __init__(self) -> None:
+        self.calls: dict[str, int] = {}
+        self.seconds: dict[str, float] = {}
+        self.__installed = []
+
+    def install(self, engine, methods: tuple[str, ...] = PROFILED_METHODS) -> None:
+        for name in methods:
+            if name in vars(engine):
+                continue
+            setattr(engine, name, self.__timed(name, getattr(engine, name)))
+            self.__installed.append((engine, name))
+
+    def uninstall(self) -> None:
+        for engine, name in self.__installed:
+            delattr(engine, name)
+        self.__installed = []
+
+    def __timed(self, name: str, method):
+        calls, seconds = self.calls, self.seconds
+        calls.setdefault(name, 0)
+        seconds.setdefault(name, 0.0)
+
+        @wraps(method)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                seconds[name] += time.perf_counter() - start
+                calls[name] += 1
+        return timed
+
+    def reset(self) -> None:
+        for name in self.calls:
+            self.calls[name] = 0
+            self.seconds[name] = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            name: {"calls": self.calls[name], "seconds": round(self.seconds[name], 6)}
+            for name in sorted(self.calls, key=lambda name: self.seconds[name], reverse=True)
+        }
@@ -0,0 +1,206 @@
+"""
+Self-play tournament between two engine configurations, played headless across worker processes.
+Every opening is played twice, once with each configuration as white. Games end on checkmate, stalemate,
+threefold repetition, the fifty move rule or a move limit.
+Run with: python Tournament.py [--a CONFIG] [--b CONFIG] [--openings FILE.epd] [--rounds N] [--workers N] [--output FILE.jsonl]
+A configuration is a JSON object of search limits (depth, time_limit_ms, node_limit) and ChessEngine options,
+for example '{"depth": 2, "use_positional": true}'.
+Writes one JSON line per game to the output file as games finish, and prints a summary with the Elo difference as JSON.
+"""
+import argparse
+import contextlib
+import json
+import math
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Engine import ChessEngine
+from Enums.SideEnum import SideEnum as Side
+from Epd import read_epd
+from Notation import move_to_uci
+
+# Opening positions played when no suite is given, a few moves into common openings.
+OPENINGS = [
+    "r1bqkbnr/pppp1ppp/2n5/1B2p3/4P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 3 3",  # e4 e5 Nf3 Nc6 Bb5
+    "rnbqkbnr/pp2pppp/3p4/2p5/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 0 3",  # e4 c5 Nf3 d6
+    "rnbqkbnr/ppp2ppp/4p3/3p4/2PP4/8/PP2PPPP/RNBQKBNR w KQkq - 0 3",  # d4 d5 c4 e6
+    "rnbqkb1r/pppppp1p/5np1/8/2PP4/8/PP2PPPP/RNBQKBNR w KQkq - 0 3",  # d4 Nf6 c4 g6
+    "rnbqkbnr/ppp2ppp/4p3/3p4/3PP3/8/PPP2PPP/RNBQKBNR w KQkq d6 0 3",  # e4 e6 d4 d5
+    "rnbqkbnr/pp2pppp/2p5/3p4/3PP3/8/PPP2PPP/RNBQKBNR w KQkq d6 0 3",  # e4 c6 d4 d5
+    "rnbqkb1r/pppp1ppp/5n2/4p3/2P5/2N5/PP1PPPPP/R1BQKBNR w KQkq - 2 3",  # c4 e5 Nc3 Nf6
+    "rnbqkb1r/ppp1pppp/5n2/3p4/8/5NP1/PPPPPP1P/RNBQKB1R w KQkq - 1 3",  # Nf3 d5 g3 Nf6
+    "r1bqk1nr/pppp1ppp/2n5/2b1p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",  # e4 e5 Nf3 Nc6 Bc4 Bc5
+    "rnbqkbnr/pp2pppp/2p5/3p4/2PP4/8/PP2PPPP/RNBQKBNR w KQkq - 0 3",  # d4 d5 c4 c6
+]
+# Configuration keys which limit each search, the other keys are passed to ChessEngine.
+SEARCH_LIMITS = ("depth", "time_limit_ms", "node_limit")
+DEFAULT_CONFIG = {"depth": 2}
+# Plies a game may last before it is scored as a draw.
+DEFAULT_MAX_PLIES = 300
+
+
+def split_config(config: dict) -> tuple[dict, dict]:
+    limits = {key: config[key] for key in SEARCH_LIMITS if key in config}
+    options = {key: value for key, value in config.items() if key not in SEARCH_LIMITS}
+    return limits, options
+
+
+# Plays one game from the opening, with the configurations named by the keys of configs as white and black.
+# Both engines make every move, so each keeps the whole game in its history.
+def play_game(game: int, opening: str, white: str, black: str, configs: dict, max_plies: int, seed: int) -> dict:
+    random.seed(seed)
+    players = {}
+    for side, name in ((Side.WHITE, white), (Side.BLACK, black)):
+        limits, options = split_config(configs[name])
+        players[side] = (name, ChessEngine.from_fen(opening, **options), limits)
+    engines = [engine for _, engine, _ in players.values()]
+    referee = engines[0]
+
+    nodes = {white: 0, black: 0}
+    seconds = {white: 0.0, black: 0.0}
+    moves = []
+    repetitions = {referee.zobrist_key: 1}
+    result, reason = "1/2-1/2", "move limit"
+    while len(moves) < max_plies:
+        legal = referee.generate_legal_moves()
+        if not legal:
+            if referee.in_check()[0]:
+                result, reason = ("0-1" if referee.SideToPlay is Side.WHITE else "1-0"), "checkmate"
+            else:
+                reason = "stalemate"
+            break
+        if referee.halfmoveClock >= 100:
+            reason = "fifty moves"
+            break
+
+        name, engine, limits = players[referee.SideToPlay]
+        start = time.perf_counter()
+        move = engine.search_moves(engine.generate_legal_moves(), limits.get("depth"),
+                                   limits.get("time_limit_ms"), limits.get("node_limit"))
+        seconds[name] += time.perf_counter() - start
+        nodes[name] += engine.nodes
+
+        moves.append(move_to_uci(move))
+        for player in engines:
+            player.makeMove(next(legal_move for legal_move in player.generate_legal_moves() if legal_move.key == move.key))
+        repetitions[referee.zobrist_key] = repetitions.get(referee.zobrist_key, 0) + 1
+        if repetitions[referee.zobrist_key] >= 3:
+            reason = "repetition"
+            break
+
+    for player in engines:
+        player.close_workers()
+    return {
+        "game": game,
+        "opening": opening,
+        "white": white,
+        "black": black,
+        "result": result,
+        "reason": reason,
+        "plies": len(moves),
+        "moves": moves,
+        "nodes": nodes,
+        "seconds": {name: round(value, 4) for name, value in seconds.items()},
+        "nps": {name: round(nodes[name] / seconds[name]) if seconds[name] > 0 else None for name in nodes},
+    }
+
+
+# Score of configuration a from the games, with the Elo difference it implies and its 95% margin.
+def elo_summary(records: list[dict], a: str = "a") -> dict:
+    wins = draws = losses = 0
+    for record in records:
+        if record["result"] == "1/2-1/2":
+            draws += 1
+        elif (record["result"] == "1-0") == (record["white"] == a):
+            wins += 1
+        else:
+            losses += 1
+    games = wins + draws + losses
+    summary = {"wins": wins, "draws": draws, "losses": losses, "score": None, "elo": None, "elo_margin": None}
+    if games == 0:
+        return summary
+    score = (wins + draws / 2) / games
+    summary["score"] = round(score, 4)
+
+    def elo(value: float) -> float:
+        return -400 * math.log10(1 / value - 1)
+
+    # A clean sweep either way has no finite Elo difference.
+    if 0 < score < 1:
+        summary["elo"] = round(elo(score), 1)
+        deviation = math.sqrt((wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games)
+        margin = 1.96 * deviation / math.sqrt(games)
+        if 0 < score - margin and score + margin < 1:
+            summary["elo_margin"] = round((elo(score + margin) - elo(score - margin)) / 2, 1)
+    return summary
+
+
+# Plays every opening twice per round, once with each configuration as white, writing each game to output as it ends.
+def run_tournament(configs: dict, openings: list[str], rounds: int = 1, workers: int = None, output: str = None,
+                   max_plies: int = DEFAULT_MAX_PLIES, seed: int = 0) -> dict:
+    workers = workers or multiprocessing.cpu_count()
+    games = []
+    for _ in range(rounds):
+        for opening in openings:
+            games.append((opening, "a", "b"))
+            games.append((opening, "b", "a"))
+    arguments = [
+        (game, opening, white, black, configs, max_plies, seed + game)
+        for game, (opening, white, black) in enumerate(games)
+    ]
+
+    records = []
+    start = time.perf_counter()
+    with contextlib.ExitStack() as stack:
+        file = stack.enter_context(open(output, "w")) if output else None
+        if workers > 1:
+            executor = stack.enter_context(ProcessPoolExecutor(workers))
+            finished = (future.result() for future in as_completed([executor.submit(play_game, *game) for game in arguments]))
+        else:
+            finished = (play_game(*game) for game in arguments)
+        for record in finished:
+            records.append(record)
+            if file is not None:
+                file.write(json.dumps(record) + "\n")
+                file.flush()
+    seconds = time.perf_counter() - start
+
+    nodes = sum(sum(record["nodes"].values()) for record in records)
+    search_seconds = sum(sum(record["seconds"].values()) for record in records)
+    reasons = {}
+    for record in records:
+        reasons[record["reason"]] = reasons.get(record["reason"], 0) + 1
+    return {
+        "configs": configs,
+        "games": len(records),
+        "workers": workers,
+        "seconds": round(seconds, 4),
+        "games_per_second": round(len(records) / seconds, 3) if seconds > 0 else None,
+        "nodes": nodes,
+        "nps": round(nodes / search_seconds) if search_seconds > 0 else None,
+        "reasons": reasons,
+        "a": elo_summary(records, "a"),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play engine configurations against each other and print the results as JSON.")
+    parser.add_argument("--a", type=json.loads, default=DEFAULT_CONFIG, help="configuration of the first engine, as JSON")
+    parser.add_argument("--b", type=json.loads, default=DEFAULT_CONFIG, help="configuration of the second engine, as JSON")
+    parser.add_argument("--openings", help="EPD file of opening positions, defaults to a built in suite")
+    parser.add_argument("--rounds", type=int, default=1, help="times every opening is played with each colour")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="worker processes playing games")
+    parser.add_argument("--output", default="tournament.jsonl", help="JSONL file the games are written to")
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES, help="plies before a game is drawn")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random choice between equally good moves")
+    args = parser.parse_args()
+
+    openings = OPENINGS
+    if args.openings:
+        with open(args.openings) as file:
+            openings = [fen for fen, _ in read_epd(file)]
+    summary = run_tournament({"a": args.a, "b": args.b}, openings, args.rounds, args.workers, args.output,
+                             args.max_plies, args.seed)
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,70 @@
+from enum import Enum
+
+
+class Bound(Enum):
+    EXACT = 0
+    # Score is at least the stored value (search failed high).
+    LOWER = 1
+    # Score is at most the stored value (search failed low).
+    UPPER = 2
+
+
+# Rough size of one stored entry: the tuple, the 64 bit key, the score and the best move.
+ENTRY_BYTES = 200
+# Every bucket has a depth-preferred slot and an always-replace slot.
+BUCKET_BYTES = 2 * (ENTRY_BYTES + 8)
+
+
+class TranspositionTable:
+    """
+    Fixed size cache of search results keyed by zobrist key.
+    Entries are tuples of (key, depth, score, bound, best move).
+    Each bucket keeps the deepest result in one slot and the most recent result in the other,
+    so shallow searches cannot evict expensive deep results.
+    """
+
+    def __init__(self, size_mb: float = 16) -> None:
+        self.size_mb = size_mb
+        self.bucket_count = max(1, int(size_mb * 1024 * 1024) // BUCKET_BYTES)
+        self.clear()
+
+    def clear(self) -> None:
+        self.__depth_preferred: list[tuple] = [None] * self.bucket_count
+        self.__always_replace: list[tuple] = [None] * self.bucket_count
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        # Probes which found the bucket filled by a different position.
+        self.collisions = 0
+        self.stores = 0
+
+    def probe(self, key: int) -> tuple:
+        index = key % self.bucket_count
+        for entry in (self.__depth_preferred[index], self.__always_replace[index]):
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                return entry
+        self.misses += 1
+        if self.__depth_preferred[index] is not None or self.__always_replace[index] is not None:
+            self.collisions += 1
+        return None
+
+    def store(self, key: int, depth: int, score, bound: Bound, best_move) -> None:
+        index = key % self.bucket_count
+        entry = (key, depth, score, bound, best_move)
+        self.stores += 1
+        current = self.__depth_preferred[index]
+        if current is None or current[0] == key or depth >= current[1]:
+            self.__depth_preferred[index] = entry
+        else:
+            self.__always_replace[index] = entry
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "collisions": self.collisions,
+            "stores": self.stores,
+        }
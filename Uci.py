@@ -0,0 +1,176 @@
+"""
+Headless UCI front end: speaks the Universal Chess Interface over stdin and stdout, without pygame.
+Supports uci, isready, ucinewgame, position (startpos or fen, with moves), go (depth, movetime, nodes, wtime/btime, infinite),
+stop and quit. The search runs on a worker thread, so stop and isready are answered while it thinks.
+Run with: python Uci.py [--book PATH] [--hash MB] [--bitboards]
+Measure startup with: python Uci.py --startup, which prints the time to import and set up the engine as JSON.
+"""
+import time
+
+STARTED = time.perf_counter()
+
+import argparse
+import sys
+import threading
+from typing import TextIO
+
+from Engine import ChessEngine, START_FEN, MATE_SCORE
+from BackgroundSearch import BackgroundSearch
+from Enums.SideEnum import SideEnum as Side
+from Move import Move
+from Notation import move_to_uci, move_from_uci
+
+ENGINE_NAME = "Chess"
+ENGINE_AUTHOR = "KLiu00"
+# Milliseconds importing the engine and setting it up may take before --startup reports a failure.
+STARTUP_BUDGET_MS = 100
+# Moves the remaining clock time is shared between when the GUI does not send movestogo.
+DEFAULT_MOVES_TO_GO = 30
+
+
+class UciEngine:
+    """
+    Keeps the position set by the GUI on an engine of its own, and searches it with a BackgroundSearch.
+    Output is written as whole lines under a lock, as the search thread writes its best move while commands are read.
+    """
+
+    def __init__(self, output: TextIO, **engine_options) -> None:
+        self.output = output
+        self.__outputLock = threading.Lock()
+        # Only holds the position and checks moves, so its transposition table is kept small.
+        self.position = ChessEngine(tt_size_mb=0.1, bitbase_directory=None)
+        self.search = BackgroundSearch(**engine_options)
+        self.__searchStart = 0.0
+
+    def send(self, line: str) -> None:
+        with self.__outputLock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    # Handles one command line. Returns False once the GUI asks to quit.
+    def handle(self, line: str) -> bool:
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, arguments = tokens[0], tokens[1:]
+        # Bad FEN or illegal moves are reported to the GUI, the engine keeps running.
+        try:
+            return self.__dispatch(command, arguments)
+        except ValueError as error:
+            self.send(f"info string {error}")
+            return True
+
+    def __dispatch(self, command: str, arguments: list[str]) -> bool:
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "ucinewgame":
+            self.search.cancel()
+            self.search.engine.transposition_table.clear()
+        elif command == "position":
+            self.search.cancel()
+            self.set_position(arguments)
+        elif command == "go":
+            self.go(arguments)
+        elif command == "stop":
+            self.search.stop()
+        elif command == "quit":
+            self.search.cancel()
+            return False
+        # Unknown commands are ignored, as the protocol asks.
+        return True
+
+    # position startpos [moves ...] or position fen <fen> [moves ...]
+    # Raises ValueError for bad FEN or an illegal move, leaving the previous position in place.
+    def set_position(self, arguments: list[str]) -> None:
+        previous = self.position.to_fen()
+        moves_index = arguments.index("moves") if "moves" in arguments else len(arguments)
+        try:
+            if arguments and arguments[0] == "fen":
+                self.position.load_fen(" ".join(arguments[1:moves_index]))
+            else:
+                self.position.load_fen(START_FEN)
+            for text in arguments[moves_index + 1:]:
+                self.position.makeMove(move_from_uci(self.position, text))
+        except ValueError:
+            self.position.load_fen(previous)
+            raise
+
+    def go(self, arguments: list[str]) -> None:
+        limits = {}
+        for name, value in zip(arguments, arguments[1:]):
+            if value.lstrip("-").isdigit():
+                limits[name] = int(value)
+        depth = limits.get("depth")
+        node_limit = limits.get("nodes")
+        time_limit_ms = limits.get("movetime")
+        clock = "wtime" if self.position.SideToPlay is Side.WHITE else "btime"
+        if time_limit_ms is None and clock in limits:
+            increment = limits.get("winc" if clock == "wtime" else "binc", 0)
+            time_limit_ms = max(1, limits[clock] // limits.get("movestogo", DEFAULT_MOVES_TO_GO) + increment // 2)
+
+        if not self.position.generate_legal_moves():
+            self.send("bestmove 0000")
+            return
+        self.__searchStart = time.perf_counter()
+        self.search.start(self.position, depth, time_limit_ms, node_limit, on_result=self.__report)
+
+    # Called on the search thread with the move it found.
+    def __report(self, move: Move) -> None:
+        engine = self.search.engine
+        milliseconds = round((time.perf_counter() - self.__searchStart) * 1000)
+        if engine.last_evaluation is not None and engine.stats.depths:
+            # The last finished iteration, current_depth may be one a time or node limit stopped.
+            depth = engine.stats.depths[-1]["depth"]
+            # Evaluations are from white's side in pawns, UCI scores are from the side to play in centipawns.
+            evaluation = engine.last_evaluation if engine.SideToPlay is Side.WHITE else -engine.last_evaluation
+            if abs(evaluation) >= MATE_SCORE:
+                # Mate scores grow with the depth left when the mate was found.
+                plies = max(1, depth + 1 - (abs(evaluation) - MATE_SCORE))
+                score = f"mate {(plies + 1) // 2 if evaluation > 0 else -((plies + 1) // 2)}"
+            else:
+                score = f"cp {round(evaluation * 100)}"
+            self.send(f"info depth {depth} score {score} nodes {engine.nodes} nps {engine.stats.nps} time {milliseconds}")
+        self.send(f"bestmove {move_to_uci(move)}")
+
+    def run(self, lines) -> None:
+        for line in lines:
+            if not self.handle(line):
+                break
+        self.search.cancel()
+
+
+def startup_times(**engine_options) -> dict:
+    imported = time.perf_counter()
+    UciEngine(sys.stdout, **engine_options)
+    ready = time.perf_counter()
+    total_ms = (ready - STARTED) * 1000
+    return {
+        "import_ms": round((imported - STARTED) * 1000, 2),
+        "engine_ms": round((ready - imported) * 1000, 2),
+        "total_ms": round(total_ms, 2),
+        "budget_ms": STARTUP_BUDGET_MS,
+        "passed": total_ms <= STARTUP_BUDGET_MS,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the engine over the UCI protocol on stdin and stdout.")
+    parser.add_argument("--book", help="opening book file to play from")
+    parser.add_argument("--hash", type=float, default=16, help="transposition table size in MB")
+    parser.add_argument("--bitboards", action="store_true", help="use the bitboard backend")
+    parser.add_argument("--startup", action="store_true", help="print the startup time as JSON and exit")
+    args = parser.parse_args()
+    options = {"opening_book": args.book, "tt_size_mb": args.hash, "use_bitboards": args.bitboards}
+
+    if args.startup:
+        import json
+        output = startup_times(**options)
+        print(json.dumps(output, indent=2))
+        if not output["passed"]:
+            raise SystemExit(1)
+    else:
+        UciEngine(sys.stdout, **options).run(sys.stdin)
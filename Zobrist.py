@@ -0,0 +1,35 @@
+import random
+
+from Enums.SideEnum import SideEnum as Side
+from Pieces.BasePiece import IPiece
+from Bitboard import bitboard_index
+
+# Fixed seed so keys, and anything stored by key, stay the same between runs.
+_generator = random.Random(0x2C0B7157)
+
+PIECE_KEYS = [[_generator.getrandbits(64) for _ in range(64)] for _ in range(12)]
+SIDE_KEY = _generator.getrandbits(64)
+# One key per combination of castling rights, no rights hashes to 0.
+CASTLING_KEYS = [0] + [_generator.getrandbits(64) for _ in range(15)]
+EN_PASSANT_KEYS = [_generator.getrandbits(64) for _ in range(8)]
+
+
+def piece_key(piece: IPiece, square: int) -> int:
+    return PIECE_KEYS[bitboard_index(piece.side, piece.pieceType)][square]
+
+
+def en_passant_key(en_passant_square: int) -> int:
+    if en_passant_square is None:
+        return 0
+    return EN_PASSANT_KEYS[en_passant_square % 8]
+
+
+# Hashes a position from scratch. ChessEngine keeps the same key up to date move by move.
+def compute_hash(board: list[IPiece], side_to_play: Side, castling_rights: int, en_passant_square: int) -> int:
+    key = 0
+    for square, cell in enumerate(board):
+        if cell is not None:
+            key ^= piece_key(cell, square)
+    if side_to_play is Side.BLACK:
+        key ^= SIDE_KEY
+    return key ^ CASTLING_KEYS[castling_rights] ^ en_passant_key(en_passant_square)
@@ -4,9 +4,15 @@ from ChessUtility import indexToRF, rfToIndex
 from Enums.PieceEnum import PieceEnum
 from Move import Move
 from Enums.SideEnum import SideEnum
+from BackgroundSearch import BackgroundSearch
 
 import os
 
+# Frames drawn per second while playing against the computer.
+FRAME_RATE = 30
+# Opening book the computer plays from, used when the file exists. Build it with OpeningBook.py.
+BOOK_PATH = "book.bin"
+
 
 def get_board_index(x, y):
     column = x // pixel_size
@@ -59,60 +65,87 @@ def stalemate_screen(canvas):
                 closed = True
 
 
+def draw_thinking(canvas, search: BackgroundSearch):
+    canvas.blit(pygame.TEXT_FONT.render(f"Thinking... depth {search.depth}, {search.nodes} nodes", True, (150, 0, 150)),
+                (0, 0))
+
 def player_vs_computer(canvas, start_side: SideEnum, depth: int):
     exit = False
     instance = Chess()
+    search = BackgroundSearch(opening_book=BOOK_PATH if os.path.exists(BOOK_PATH) else None)
+    clock = pygame.time.Clock()
+    computer_side = SideEnum.WHITE if start_side is SideEnum.BLACK else SideEnum.BLACK
     start_pressed_board_position = 0
+    # squares outlined on top of the board, with their colours
+    highlights = []
+    # whether a search was started for the computer's current move and its result has not been read yet
+    search_pending = False
     draw_board(canvas, instance.board)
     while not instance.checkmated and not instance.stalemated and not exit:
-        pygame.display.update()
+        # The search runs on a background thread, the window keeps drawing and handling events while it thinks.
+        # Only start a search when none is pending, so a finished search is always read before another one starts.
+        if instance.SideToPlay is computer_side and not search_pending:
+            search.start(instance, depth)
+            search_pending = True
+        move = search.poll()
+        if move is not None:
+            search_pending = False
+            instance.makeMove(next(legal for legal in instance.generate_legal_moves() if legal.key == move.key))
+            highlights = [((255, 0, 0), move.startPosition), ((255, 0, 0), move.endPosition)]
+            pygame.mixer.music.play()
+            instance.checkmated = instance.in_checkmate()
+            instance.stalemated = instance.in_stalemate()
+
         for event in pygame.event.get():
-            if instance.SideToPlay is (SideEnum.WHITE if start_side is SideEnum.BLACK else SideEnum.BLACK):
-                moves = instance.generate_legal_moves()
-                move = instance.search_moves(moves, depth)
-                instance.makeMove(move)
-                instance.checkmated = instance.in_checkmate()
-                draw_board(canvas, instance.board)
-                pygame.draw.rect(canvas, (255, 0, 0), draw_square(
-                    pixel_size, move.startPosition), 5)
-                pygame.draw.rect(canvas, (255, 0, 0), draw_square(
-                    pixel_size, move.endPosition), 5)
-                pygame.mixer.music.play()
             current_mouse_location = pygame.mouse.get_pos()
             if event.type is pygame.QUIT:
+                search.cancel()
                 exit = True
             if event.type == pygame.MOUSEBUTTONDOWN:
+                # Right click takes back the last move of each side, stopping the search if it is thinking.
+                if pygame.mouse.get_pressed()[2]:
+                    search.cancel()
+                    search_pending = False
+                    instance.unmakeMove()
+                    if instance.SideToPlay is computer_side:
+                        instance.unmakeMove()
+                    highlights = []
+                    continue
+                if instance.SideToPlay is computer_side:
+                    continue
                 start_pressed_board_position = get_board_index(
                     current_mouse_location[0], current_mouse_location[1]
                 )
                 all_moves = instance.generate_legal_moves()
-                for moves in all_moves:
-                    if moves.startPosition is start_pressed_board_position:
-                        pygame.draw.rect(canvas, (0, 255, 0), draw_square(
-                            pixel_size, moves.endPosition), 5)
-            if event.type == pygame.MOUSEBUTTONUP:
-                draw_board(canvas, instance.board)
+                highlights = [((0, 255, 0), moves.endPosition) for moves in all_moves if moves.startPosition is start_pressed_board_position]
+            if event.type == pygame.MOUSEBUTTONUP and instance.SideToPlay is not computer_side:
+                highlights = []
                 current_board_position = get_board_index(
                     current_mouse_location[0], current_mouse_location[1]
                 )
                 toMake = f"{indexToRF(start_pressed_board_position)}{indexToRF(current_board_position)}"
                 all_moves = instance.generate_legal_moves()
                 rf_moves = []
-                total = 0
                 for move in all_moves:
-                    total += 1
                     rf_moves.append(
                         f"{move.startRf}{move.endRf}"
                     )
                 if toMake not in rf_moves:
                     continue
                 instance.makeMove(all_moves[rf_moves.index(toMake)])
-                
-                draw_board(canvas, instance.board)
                 pygame.mixer.music.play()
-        instance.checkmated = instance.in_checkmate()
-        instance.stalemated = instance.in_stalemate()
-        
+                instance.checkmated = instance.in_checkmate()
+                instance.stalemated = instance.in_stalemate()
+
+        draw_board(canvas, instance.board)
+        for colour, board_index in highlights:
+            pygame.draw.rect(canvas, colour, draw_square(pixel_size, board_index), 5)
+        if search.thinking:
+            draw_thinking(canvas, search)
+        pygame.display.update()
+        clock.tick(FRAME_RATE)
+
+    search.cancel()
     if instance.checkmated:
         checkmate_screen(
             canvas, SideEnum.WHITE if instance.SideToPlay is SideEnum.BLACK else SideEnum.BLACK)
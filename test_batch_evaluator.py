@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from Engine import ChessEngine
+from Evaluator import evaluate_board
+from BatchEvaluator import encode_board, encode_boards, evaluate_batch, evaluate_stream
+
+
+# Boards from seeded random playouts, including captures and promotions along the way.
+def random_boards(games: int = 20, plies: int = 120, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(games):
+        engine = ChessEngine(tt_size_mb=0.1)
+        boards.append(list(engine.board))
+        for _ in range(plies):
+            moves = engine.generate_legal_moves()
+            if not moves:
+                break
+            engine.makeMove(rng.choice(moves))
+            boards.append(list(engine.board))
+    return boards
+
+
+BOARDS = random_boards()
+
+
+@pytest.mark.parametrize("use_positional", [False, True])
+def test_evaluate_batch_matches_evaluate_board(use_positional):
+    scores = evaluate_batch(encode_boards(BOARDS), use_positional)
+    assert list(scores) == [evaluate_board(board, use_positional) for board in BOARDS]
+
+
+@pytest.mark.parametrize("use_positional", [False, True])
+def test_evaluate_stream_matches_across_chunks(use_positional):
+    batch_size = 64
+    # Not a multiple of the batch size, so the last chunk is partial.
+    boards = BOARDS[:3 * batch_size + 5]
+    chunks = list(evaluate_stream((encode_board(board) for board in boards), batch_size, use_positional))
+    assert [len(chunk) for chunk in chunks] == [batch_size] * 3 + [5]
+    assert list(np.concatenate(chunks)) == [evaluate_board(board, use_positional) for board in boards]
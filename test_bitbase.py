@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from Engine import ChessEngine, FEN_PIECES
+from Bitbase import Bitbases, TABLES, generate_all
+from Enums.SideEnum import SideEnum as Side
+from Enums.PieceEnum import PieceEnum as PieceType
+
+SAMPLES_PER_TABLE = 300
+
+
+# Generated from scratch, so the test checks what the generator produces now rather than tables left on disk.
+@pytest.fixture(scope="module")
+def bitbases(tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp("bitbases"))
+    generate_all(directory)
+    tables = Bitbases(directory)
+    yield tables
+    tables.close()
+
+
+def probe(bitbases: Bitbases, engine: ChessEngine) -> bool:
+    # Positions no table covers, after the piece is taken or promoted to a bishop or knight, are draws.
+    return bool(bitbases.probe(engine.board, engine.pieceSquares, engine.SideToPlay))
+
+
+# Random legal positions with a king and the piece against a lone king, for either side as the stronger one.
+def random_positions(pieceType: PieceType, count: int, seed: int = 3):
+    rng = random.Random(seed)
+    letter = next(letter for letter, pieceClass in FEN_PIECES.items() if pieceClass(Side.WHITE).pieceType is pieceType)
+    positions = []
+    while len(positions) < count:
+        strong = rng.choice(list(Side))
+        weak = Side.BLACK if strong is Side.WHITE else Side.WHITE
+        squares = rng.sample(range(64), 3)
+        if pieceType is PieceType.PAWN and not 8 <= squares[1] < 56:
+            continue
+        board = [None] * 64
+        board[squares[0]] = FEN_PIECES["k"](strong)
+        board[squares[1]] = FEN_PIECES[letter](strong)
+        board[squares[2]] = FEN_PIECES["k"](weak)
+        engine = ChessEngine(tt_size_mb=0.1, bitbase_directory=None)
+        to_move = rng.choice(list(Side))
+        engine.load_position(board, to_move, 0, None)
+        # The side which just moved may not be left in check.
+        waiting = Side.BLACK if to_move is Side.WHITE else Side.WHITE
+        if engine.attackers(engine.kingSquares[waiting.value], to_move):
+            continue
+        positions.append(engine)
+    return positions
+
+
+# A one ply search with the engine's move generator, scoring the positions it reaches with the bitbases,
+# has to agree with the bitbase: the stronger side wins if one of its moves wins, the lone king loses if all of its moves do.
+@pytest.mark.parametrize("pieceType", list(TABLES.values()))
+def test_bitbase_agrees_with_move_generator(bitbases, pieceType):
+    for engine in random_positions(pieceType, SAMPLES_PER_TABLE):
+        strong_to_move = len(engine.pieceSquares[engine.SideToPlay.value]) == 2
+        moves = engine.generate_legal_moves()
+        if not moves:
+            # Checkmate of the lone king is the only win without a move to play.
+            expected = not strong_to_move and engine.in_check()[0]
+        else:
+            results = []
+            for move in moves:
+                engine.makeMove(move)
+                results.append(probe(bitbases, engine))
+                engine.unmakeMove()
+            expected = any(results) if strong_to_move else all(results)
+        assert probe(bitbases, engine) == expected, engine.to_fen()
@@ -0,0 +1,32 @@
+import pytest
+
+from Engine import ChessEngine, START_FEN
+
+
+def test_round_trip():
+    fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+    assert ChessEngine.from_fen(fen, bitbase_directory=None).to_fen() == fen
+
+
+@pytest.mark.parametrize("fen", [
+    # No white king
+    "4k3/8/8/8/8/8/8/8 w - - 0 1",
+    # Two black kings
+    "4k2k/8/8/8/8/8/8/4K3 w - - 0 1",
+    # White short castling without the rook on h1
+    "4k3/8/8/8/8/8/8/R3K3 w K - 0 1",
+    # Black long castling with the king off e8
+    "r2k4/8/8/8/8/8/8/4K3 w q - 0 1",
+    # Castling right with a rook of the other side on the corner
+    "4k3/8/8/8/8/8/8/4K2r w K - 0 1",
+])
+def test_rejects_impossible_positions(fen):
+    with pytest.raises(ValueError):
+        ChessEngine.from_fen(fen, bitbase_directory=None)
+
+
+def test_rejected_fen_keeps_position():
+    engine = ChessEngine.from_fen(START_FEN, bitbase_directory=None)
+    with pytest.raises(ValueError):
+        engine.load_fen("4k3/8/8/8/8/8/8/8 w - - 0 1")
+    assert engine.to_fen() == START_FEN
@@ -0,0 +1,13 @@
+import json
+import os
+import subprocess
+import sys
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+
+
+# Startup is measured in a fresh interpreter, as the test process has already imported most modules.
+def test_startup_within_budget():
+    result = subprocess.run([sys.executable, "Uci.py", "--startup"], cwd=REPO, capture_output=True, text=True)
+    times = json.loads(result.stdout)
+    assert times["passed"], times